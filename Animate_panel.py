@@ -1,9 +1,8 @@
 import PySimpleGUI as sg
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
-from funcao import create_panel, animate
+from funcao import create_panel, AnimacaoPainel
 
 
 def draw_animate(canvas, figure):
@@ -27,15 +26,15 @@ def main():
     canvas_elem = window['-CANVAS-']
     canvas = canvas_elem.Widget
 
-    global panel, step, ani
     panel = create_panel()
-    step = [1]  # Lista para manter referência mutável
     frames = 50
-    ani = None
 
     fig = plt.figure()
     ax = fig.add_subplot(111, projection='3d')
 
+    # Elementos estáticos criados uma única vez; as posições de todos os quadros são calculadas ao iniciar
+    animacao = AnimacaoPainel(fig, ax, panel, frames)
+
     # Embutir a figura do Matplotlib no Canvas do PySimpleGUI
     figure_canvas_agg = draw_animate(canvas, fig)
 
@@ -54,11 +53,7 @@ def main():
                     continue
 
                 # Reiniciar a animação
-                ax.cla()  # Limpa o gráfico para a nova animação
-                ani = FuncAnimation(
-                    fig, animate, fargs=(angle_x, angle_z, panel, frames, ax, step),
-                    frames=2 * frames + 1, interval=30, repeat=False
-                )
+                animacao.iniciar(angle_x, angle_z)
                 figure_canvas_agg.draw()  # Atualiza a figura embutida
 
             except ValueError:
@@ -1,18 +1,98 @@
+import time
+
+# Instante inicial para o relatório de tempo de inicialização
+inicio_programa = time.perf_counter()
+
+import threading
+
 import PySimpleGUI as sg
-import pandas as pd
-import matplotlib.pyplot as plt
-from funcao import plot_hourly_data, calculate_solar_parameters, calcular_resultados, calcular_gasto_sem_painel, \
-    calcular_payback, calcular_geracao_mensal, calcular_gasto_com_painel
-from funcao import create_panel, animate, draw_animate
-from matplotlib.animation import FuncAnimation
-from teste_HiKu7 import HIKU7
-
-# Carregar os dados
-url = "https://docs.google.com/spreadsheets/d/1W1V5ExxROoVLTQAdsYKVv98rweN_bEoSwFwct9DN3Ao/gviz/tq?tqx=out:csv"
-df = pd.read_csv(url)
-df['Data_Hora'] = pd.to_datetime(df['Data_Hora'], format='%d/%m/%y %H:%M')
-df['Radiação'] = df['Radiação'].str.replace(',', '.').astype(float)
-df['Temp_Cel'] = df['Temp_Cel'].str.replace(',', '.').astype(float)
+
+# Os módulos pesados (pandas, matplotlib, scipy, modelo do painel) e os dados de medição são carregados
+# no primeiro uso ou em segundo plano, depois que o menu principal já está na tela.
+etapas_inicializacao = []
+
+
+# Função para registrar uma etapa da inicialização (tempo desde o início do programa)
+def registrar_etapa(descricao):
+    etapas_inicializacao.append((descricao, time.perf_counter() - inicio_programa))
+
+
+# Função para exibir o relatório de tempo de inicialização
+def relatorio_inicializacao():
+    print("Tempo de inicialização:")
+    for descricao, tempo in etapas_inicializacao:
+        print(f"  {tempo * 1000:8.1f} ms  {descricao}")
+
+
+# Etapas do carregamento em segundo plano, na ordem em que são executadas
+def _carregar_dados():
+    from data_loader import carregar_dados
+    carregar_dados()
+
+
+def _carregar_graficos():
+    import funcao  # matplotlib e backend tk
+
+
+def _carregar_modelo():
+    import teste_HiKu7  # scipy e modelo de diodo simples
+
+
+etapas_carregamento = [
+    ('Carregando dados de medição...', _carregar_dados),
+    ('Carregando gráficos...', _carregar_graficos),
+    ('Carregando modelo do painel...', _carregar_modelo),
+]
+
+
+# Função executada em uma thread: carrega módulos e dados e informa o progresso à janela
+def carregar_em_segundo_plano(window):
+    for indice, (descricao, etapa) in enumerate(etapas_carregamento):
+        window.write_event_value('-CARREGANDO-', (indice, descricao))
+        try:
+            etapa()
+        except Exception as e:
+            window.write_event_value('-ERRO-CARREGAMENTO-', f'{descricao} {e}')
+            return
+        registrar_etapa(descricao.rstrip('.'))
+    window.write_event_value('-CARREGADO-', len(etapas_carregamento))
+
+
+# Funções executadas pelo ExecutorTarefas, fora do laço de eventos das janelas
+def calcular_irradiancia_inclinada(data_hora_str, beta, gamma_p, lat, long_local, long_meridiano):
+    import pandas as pd
+    from data_loader import carregar_dados
+    from funcao import calculate_solar_parameters
+
+    df = carregar_dados()
+    data_hora = pd.to_datetime(data_hora_str, format='%Y-%m-%d %H:%M:%S')
+
+    selected_index = df[df['Data_Hora'] == data_hora].index[0]
+    irradiancia_global = df['Radiação'].iloc[selected_index]
+
+    hora_solar, theta_i, G_inc = calculate_solar_parameters(
+        data_hora, irradiancia_global, beta, gamma_p, lat, long_local, long_meridiano
+    )
+    return data_hora, irradiancia_global, hora_solar, theta_i, G_inc
+
+
+def calcular_integracao(data, hora, beta, gamma_p, lat, long_local, long_meridiano, Amp, Ang):
+    from funcao import calcular_grandezas_rede
+    from teste_HiKu7 import calcular_HIKU7
+
+    resultados, curva, maximum_power_point = calcular_HIKU7(
+        data, hora, beta, gamma_p, lat, long_local, long_meridiano)
+    Pmed = resultados[4]  # Potência gerada pelo módulo
+    return resultados, curva, maximum_power_point, calcular_grandezas_rede(Pmed, Amp, Ang)
+
+
+def otimizar_periodo(inicio, fim, lat, long_local, long_meridiano, progresso=None, cancelamento=None):
+    from otimization import otimizar_inclinacao_orientacao_periodo
+    from table_data import datas_disponiveis
+
+    return otimizar_inclinacao_orientacao_periodo(datas_disponiveis(inicio, fim), lat, long_local, long_meridiano,
+                                                  progresso=progresso, cancelamento=cancelamento)
+
 
 dados_por_hora = 'Plotar Dados por Hora'
 irradiancia_paines_inclinacao = 'Calcular Irradiância para\nPainéis com Inclinação'
@@ -35,15 +115,32 @@ def main_menu():
         [sg.Push(), sg.Button(otimizacao, size=(25, 3)), sg.Push()],
         [sg.Push(), sg.Button(integracao, size=(25, 2)), sg.Push()],
         [sg.Push(), sg.Button(sair, size=(25, 2)), sg.Push()],
+        [sg.Push(), sg.Text('', key='-STATUS-', size=(35, 1)), sg.Push()],
+        [sg.Push(), sg.ProgressBar(len(etapas_carregamento), orientation='h', size=(25, 10), key='-PROGRESSO-'),
+         sg.Push()],
     ]
 
-    window = sg.Window('Menu Principal', menu_layout, size=(400, 600))
+    window = sg.Window('Menu Principal', menu_layout, size=(400, 650), finalize=True)
+    registrar_etapa('Menu principal exibido')
+
+    threading.Thread(target=carregar_em_segundo_plano, args=(window,), daemon=True).start()
 
     while True:
         event, values = window.read()
 
         if event == sg.WINDOW_CLOSED or event == sair:
             break
+        elif event == '-CARREGANDO-':
+            indice, descricao = values[event]
+            window['-STATUS-'].update(descricao)
+            window['-PROGRESSO-'].update(indice)
+        elif event == '-CARREGADO-':
+            window['-STATUS-'].update('Pronto.')
+            window['-PROGRESSO-'].update(values[event])
+            relatorio_inicializacao()
+        elif event == '-ERRO-CARREGAMENTO-':
+            window['-STATUS-'].update('Erro no carregamento (veja o console).')
+            print(f"Erro no carregamento em segundo plano: {values[event]}")
         elif event == dados_por_hora:
             hour_selection(window)
         elif event == irradiancia_paines_inclinacao:
@@ -63,8 +160,17 @@ def main_menu():
 
 
 def hour_selection(parent_window):
+    from funcao import plot_hourly_data
+    from table_data import datas_disponiveis
+
+    datas = datas_disponiveis()
+    data_inicial = '01/11/19' if '01/11/19' in datas else (datas[0] if datas else '')
+
     hour_layout = [
         [sg.Frame('', [
+            [sg.Text('Selecione o Dia:', justification='center')],
+            [sg.Combo(datas, default_value=data_inicial, key='-DATE-', readonly=True, size=(12, 1),
+                      enable_events=True)],
             [sg.Text('Selecione a Hora:', justification='center')],
             [sg.Slider(range=(0, 23), default_value=12, orientation='h', key='-HOUR-', size=(40, 20),
                        enable_events=True)],
@@ -82,7 +188,7 @@ def hour_selection(parent_window):
 
     selected_hour = int(hour_window['-HOUR-'].DefaultValue)
     selected_minute = int(hour_window['-MINUTE-'].DefaultValue)
-    plot_hourly_data(selected_hour, selected_minute, hour_window['-CANVAS-'].TKCanvas)
+    plot_hourly_data(selected_hour, selected_minute, hour_window['-CANVAS-'].TKCanvas, data_inicial)
 
     while True:
         hour_event, hour_values = hour_window.read()
@@ -95,13 +201,17 @@ def hour_selection(parent_window):
             hour_window.close()
             parent_window.un_hide()  # Retorna ao menu principal
             break
-        elif hour_event in ('-HOUR-', '-MINUTE-'):
+        elif hour_event in ('-DATE-', '-HOUR-', '-MINUTE-'):
             selected_hour = int(hour_values['-HOUR-'])
             selected_minute = int(hour_values['-MINUTE-'])
-            plot_hourly_data(selected_hour, selected_minute, hour_window['-CANVAS-'].TKCanvas)
+            plot_hourly_data(selected_hour, selected_minute, hour_window['-CANVAS-'].TKCanvas, hour_values['-DATE-'])
 
 
 def inclinação(parent_window):
+    import matplotlib.pyplot as plt
+    from execucao import ExecutorTarefas, RESULTADO, ERRO
+    from funcao import create_panel, draw_animate, AnimacaoPainel
+
     layout = [
         [sg.Text('Digite a Data e Hora (yyyy-mm-dd HH:MM:SS):', justification='center')],
         [sg.InputText('2019-11-01 12:00:00', key='data_hora_input', size=(25, 1), justification='center')],
@@ -128,22 +238,26 @@ def inclinação(parent_window):
     canvas_elem = window_inc['-CANVAS-']
     canvas = canvas_elem.Widget
 
-    global panel, step
     panel = create_panel()
-    step = [1]
     frames = 50
 
-    # Configurar a figura e o eixo 3D
+    # Configurar a figura e o eixo 3D (elementos estáticos criados uma única vez)
     fig = plt.figure()
     ax = fig.add_subplot(111, projection='3d')
+    animacao = AnimacaoPainel(fig, ax, panel, frames)
 
     # Embutir a figura no Canvas
     figure_canvas_agg = draw_animate(canvas, fig)
 
+    executor = ExecutorTarefas(window_inc)
+    tarefa = '-IRRADIANCIA-'
+
     while True:
         event, values = window_inc.read(timeout=10)
 
         if event in (sg.WINDOW_CLOSED, 'Voltar'):
+            executor.encerrar()
+            animacao.parar()
             window_inc.close()
             parent_window.un_hide()
             break
@@ -151,51 +265,56 @@ def inclinação(parent_window):
         if event == 'Calcular':
             try:
                 # Processar os dados de entrada
-                data_hora_str = values['data_hora_input']
-                data_hora = pd.to_datetime(data_hora_str, format='%Y-%m-%d %H:%M:%S')
-
-                selected_index = df[df['Data_Hora'] == data_hora].index[0]
-                irradiancia_global = df['Radiação'].iloc[selected_index]
-
                 beta = float(values['beta'])
                 gamma_p = float(values['gamma_p'])
                 lat = float(values['latitude'])
                 long_local = float(values['longitude'])
                 long_meridiano = float(values['meridiano'])
+            except ValueError:
+                sg.popup("Por favor, insira valores válidos para os ângulos.")
+                continue
+
+            window_inc['Calcular'].update(disabled=True)
+            window_inc['resultados'].update('Calculando...')
+            executor.submeter(tarefa, calcular_irradiancia_inclinada, values['data_hora_input'],
+                              beta, gamma_p, lat, long_local, long_meridiano)
+
+        elif event == (tarefa, RESULTADO):
+            window_inc['Calcular'].update(disabled=False)
+            data_hora, irradiancia_global, hora_solar, theta_i, G_inc = values[event]
+
+            # Exibir resultados na interface
+            resultados = (
+                f'Data e Hora Local: {data_hora}\n\n'
+                f'Irradiância Global: {irradiancia_global} W/m²\n\n'
+                f'Hora Solar: {hora_solar:.2f} horas\n\n'
+                f'Ângulo de incidência: {theta_i:.2f} graus\n\n'
+                f'Irradiância incidente: {G_inc:.2f} W/m²\n'
+            )
+            window_inc['resultados'].update(resultados)
 
-                hora_solar, theta_i, G_inc = calculate_solar_parameters(
-                    data_hora, irradiancia_global, beta, gamma_p, lat, long_local, long_meridiano
-                )
-
-                # Exibir resultados na interface
-                resultados = (
-                    f'Data e Hora Local: {data_hora}\n\n'
-                    f'Irradiância Global: {irradiancia_global} W/m²\n\n'
-                    f'Hora Solar: {hora_solar:.2f} horas\n\n'
-                    f'Ângulo de incidência: {theta_i:.2f} graus\n\n'
-                    f'Irradiância incidente: {G_inc:.2f} W/m²\n'
-                )
-                window_inc['resultados'].update(resultados)
-
-                # Atualizar a animação
-                ax.cla()  # Limpar o eixo
-                ani = FuncAnimation(
-                    fig, animate, fargs=(gamma_p, beta, panel, frames, ax, step),
-                    frames=2 * frames + 1, interval=30, repeat=False
-                )
+            # Atualizar a animação
+            animacao.iniciar(gamma_p, beta)
 
-                # Redesenhar a figura embutida
-                figure_canvas_agg.draw()
+            # Redesenhar a figura embutida
+            figure_canvas_agg.draw()
 
-            except ValueError:
-                sg.popup("Por favor, insira valores válidos para os ângulos.")
-            except IndexError:
+        elif event == (tarefa, ERRO):
+            window_inc['Calcular'].update(disabled=False)
+            erro = values[event]
+            if isinstance(erro, ValueError):
+                sg.popup("Por favor, insira valores válidos para a data e hora.")
+                window_inc['resultados'].update('')
+            elif isinstance(erro, IndexError):
                 window_inc['resultados'].update("Erro: Data e Hora não encontrada no dataset.")
-            except Exception as e:
-                window_inc['resultados'].update(f'Erro inesperado: {str(e)}')
+            else:
+                window_inc['resultados'].update(f'Erro inesperado: {str(erro)}')
 
 
 def potencias_selection(parent_window):
+    from execucao import ExecutorTarefas, RESULTADO, ERRO
+    from funcao import calcular_grandezas_rede, plotar_grandezas_rede, chaves_resultados_rede
+
     layout = [
         [sg.Text('Potência Média desejada Rede(W):'),
          sg.InputText(default_text='1000', key='Pmed', size=(5, 1), justification='center', enable_events=True)],
@@ -221,11 +340,15 @@ def potencias_selection(parent_window):
         except ValueError:
             return False
 
+    executor = ExecutorTarefas(window)
+    tarefa = '-GRANDEZAS-'
+
     while True:
         event, values = window.read()
         if event == sg.WINDOW_CLOSED:
             break
         elif event == 'Voltar':
+            executor.encerrar()
             window.close()
             parent_window.un_hide()  # Retorna ao menu principal
             break
@@ -237,37 +360,52 @@ def potencias_selection(parent_window):
                 Ang = float(values['Ang'])
                 Amp = float(values['Amp'])
 
-                # Chama a função para calcular resultados
-                canvas_widget = window['-CANVAS-CUSTOM-'].TKCanvas
-                pt_max, pt_media, pt_min, media_pr, Vfv, pfv, amplitude_tensao, amplitude_corrente, pfv_max, pfv_min, pfv_media, amplitude_tensao_fotovoltaico, amplitude_corrente_fotovoltaico = calcular_resultados(
-                    canvas_widget, Pmed, Amp, Ang)
-
-                # Atualiza o texto dos resultados
-                resultados_texto = (
-                    "Informações sobre o controle:\n\n"
-                    f"Potência total máxima Rede: {pt_max:.2f}\n"
-                    f"Potência total mínima Rede: {pt_min:.2f}\n\n"
-                    f"Média da potência total Rede: {pt_media:.2f}\n"
-                    f"Média da potência reativa Rede: {media_pr:.2f}\n\n"
-                    f"Amplitude máxima da tensão Rede: {amplitude_tensao:.2f}\n"
-                    f"Amplitude máxima da corrente Rede: {amplitude_corrente:.2f}\n\n"
-                    f"Potência fotovoltaica máxima: {pfv_max:.2f}\n"
-                    f"Potência fotovoltaica mínima: {pfv_min:.2f}\n"
-                    f"Média da potência fotovoltaica: {pfv_media:.2f}\n\n"
-                    f"Amplitude máxima da tensão fotovoltaica: {amplitude_tensao_fotovoltaico:.2f}\n"
-                    f"Amplitude máxima da corrente fotovoltaica: {amplitude_corrente_fotovoltaico:.2f}"
-                )
-                window['-RESULTADOS-'].update(resultados_texto)
+                # Calcula os resultados em segundo plano; o gráfico é desenhado quando o resultado chegar
+                window['Plotar'].update(disabled=True)
+                window['-RESULTADOS-'].update('Calculando...')
+                executor.submeter(tarefa, calcular_grandezas_rede, Pmed, Amp, Ang)
             else:
                 window['-RESULTADOS-'].update("Por favor, preencha todos os campos com valores numéricos válidos!")
+        elif event == (tarefa, RESULTADO):
+            window['Plotar'].update(disabled=False)
+            grandezas = values[event]
+            plotar_grandezas_rede(window['-CANVAS-CUSTOM-'].TKCanvas, grandezas)
+            pt_max, pt_media, pt_min, media_pr, Vfv, pfv, amplitude_tensao, amplitude_corrente, pfv_max, pfv_min, pfv_media, amplitude_tensao_fotovoltaico, amplitude_corrente_fotovoltaico = (
+                grandezas[chave] for chave in chaves_resultados_rede)
+
+            # Atualiza o texto dos resultados
+            resultados_texto = (
+                "Informações sobre o controle:\n\n"
+                f"Potência total máxima Rede: {pt_max:.2f}\n"
+                f"Potência total mínima Rede: {pt_min:.2f}\n\n"
+                f"Média da potência total Rede: {pt_media:.2f}\n"
+                f"Média da potência reativa Rede: {media_pr:.2f}\n\n"
+                f"Amplitude máxima da tensão Rede: {amplitude_tensao:.2f}\n"
+                f"Amplitude máxima da corrente Rede: {amplitude_corrente:.2f}\n\n"
+                f"Potência fotovoltaica máxima: {pfv_max:.2f}\n"
+                f"Potência fotovoltaica mínima: {pfv_min:.2f}\n"
+                f"Média da potência fotovoltaica: {pfv_media:.2f}\n\n"
+                f"Amplitude máxima da tensão fotovoltaica: {amplitude_tensao_fotovoltaico:.2f}\n"
+                f"Amplitude máxima da corrente fotovoltaica: {amplitude_corrente_fotovoltaico:.2f}"
+            )
+            window['-RESULTADOS-'].update(resultados_texto)
+        elif event == (tarefa, ERRO):
+            window['Plotar'].update(disabled=False)
+            window['-RESULTADOS-'].update(f'Erro no cálculo: {values[event]}')
 
     # Fechar a janela
+    executor.encerrar()
     window.close()
 
 
 # Função para mostrar a imagem do painel
 def show_panel(parent_window):
+    import report_helper
+    from execucao import ExecutorTarefas, RESULTADO, ERRO
+    from teste_HiKu7 import calcular_HIKU7
+
     layout = [
+        [sg.Text("DATA(DD/MM/AA): "), sg.InputText('01/11/19', key='data_input', size=(25, 1), justification='center')],
         [sg.Text("HORA(HH:MM): "), sg.InputText('12:00', key='hora_input', size=(25, 1), justification='center')],
 
         [sg.Text('Inclinação do painel (0° a 89°):', justification='center'),
@@ -288,28 +426,48 @@ def show_panel(parent_window):
     window = sg.Window('Painel HIKU7', layout, element_justification='c', finalize=True)
     window.Maximize()
 
+    executor = ExecutorTarefas(window)
+    tarefa = '-HIKU7-'
+
     while True:
         event, values = window.read()
         if event == sg.WINDOW_CLOSED:
             break
         elif event == 'Voltar':
+            executor.encerrar()
             window.close()
             parent_window.un_hide()  # Retorna ao menu principal
             break
         elif event == "Plotar":
-            data = '1/11/19'
+            data = values["data_input"]
             hora = values["hora_input"]
 
-            beta = float(values['beta'])
-            gamma_p = float(values['gamma_p'])
-            lat = float(values['latitude'])
-            long_local = float(values['longitude'])
-            long_meridiano = float(values['meridiano'])
-
-            canvas_widget = window['-CANVAS-CUSTOM-'].TKCanvas
-
-            temperatura_cel, actual_irradiance, angulos_irradiancia, potencia_desejada, potencia_gerada_modulo, quantidade_paineis, short_circuit_current, open_circuit_voltage, temperature_current_coefficient, series_resistance, shunt_resistance, diode_quality_factor, number_of_series_connected_cells = HIKU7(
-                canvas_widget, data, hora, beta, gamma_p, lat, long_local, long_meridiano)
+            try:
+                beta = float(values['beta'])
+                gamma_p = float(values['gamma_p'])
+                lat = float(values['latitude'])
+                long_local = float(values['longitude'])
+                long_meridiano = float(values['meridiano'])
+            except ValueError:
+                sg.popup('Dados inseridos incorretos.', title='Erro')
+                continue
+
+            window['Plotar'].update(disabled=True)
+            window['-RESULTADOS-'].update('Calculando...')
+            executor.submeter(tarefa, calcular_HIKU7, data, hora, beta, gamma_p, lat, long_local, long_meridiano)
+        elif event == (tarefa, ERRO):
+            window['Plotar'].update(disabled=False)
+            window['-RESULTADOS-'].update('')
+            sg.popup('Dados inseridos incorretos.', title='Erro')
+            print(f'Dados inseridos incorretos! {values[event]}')
+        elif event == (tarefa, RESULTADO):
+            window['Plotar'].update(disabled=False)
+            resultados, curva, maximum_power_point = values[event]
+
+            # Gerando o gráfico das curvas de tensão, corrente e potência
+            report_helper.plot_result(curva, window['-CANVAS-CUSTOM-'].TKCanvas, maximum_power_point)
+
+            temperatura_cel, actual_irradiance, angulos_irradiancia, potencia_desejada, potencia_gerada_modulo, quantidade_paineis, short_circuit_current, open_circuit_voltage, temperature_current_coefficient, series_resistance, shunt_resistance, diode_quality_factor, number_of_series_connected_cells = resultados
 
             resultados_texto = (
                 f"Informações Painel HIKU7:\n\n"
@@ -336,10 +494,13 @@ def show_panel(parent_window):
 
             )
             window['-RESULTADOS-'].update(resultados_texto)
+    executor.encerrar()
     window.close()
 
 
 def payback_menu(parent_window):
+    from funcao import calcular_gasto_sem_painel, calcular_payback, calcular_geracao_mensal, calcular_gasto_com_painel
+
     layout = [
         [sg.Text('Custo Inicial do Sistema (R$):'), sg.InputText('15000', key='-CUSTO-')],
         [sg.Text('Potência do Sistema Solar (kW):'), sg.InputText('3', key='-POTENCIA-')],
@@ -395,26 +556,97 @@ def payback_menu(parent_window):
 
 
 def show_optimization(parent_window):
+    import numpy as np
+    from execucao import ExecutorTarefas, RESULTADO, PROGRESSO, ERRO, CANCELADO
+    from funcao import draw_figure
+    from otimization import criar_figura_irradiancia
+
     layout = [
-        [sg.Column([[sg.Image(filename='figura_angulos_ideais.png')]]),
-         sg.Column([[sg.Text('Melhor inclinação: 18 graus')],
-                    [sg.Text('Melhor orientação: -12 graus (em relação ao norte)')],
-                    [sg.Text('Irradiância total máxima: 285687.82 W/m² ao\nlongo do dia')]])],
-        [sg.Button('Voltar')]
+        [sg.Column([[sg.Image(filename='figura_angulos_ideais.png', key='-IMAGEM-')],
+                    [sg.Canvas(key='-CANVAS-')]]),
+         sg.Column([[sg.Text('Melhor inclinação: 18 graus', key='-INCLINACAO-', size=(40, 1))],
+                    [sg.Text('Melhor orientação: -12 graus (em relação ao norte)', key='-ORIENTACAO-', size=(40, 1))],
+                    [sg.Text('Irradiância total máxima: 285687.82 W/m² ao\nlongo do dia', key='-IRRADIANCIA-',
+                             size=(40, 2))]])],
+        [sg.Text('Período (DD/MM/AA):'), sg.InputText('01/11/19', key='inicio', size=(10, 1), justification='center'),
+         sg.Text('a'), sg.InputText('30/11/19', key='fim', size=(10, 1), justification='center')],
+        [sg.Text('Latitude:', justification='center'),
+         sg.InputText('0', key='latitude', size=(5, 1), justification='center'),
+         sg.Text('Longitude:', justification='center'),
+         sg.InputText('-46.6', key='longitude', size=(5, 1), justification='center'),
+         sg.Text('Meridiano Central:', justification='center'),
+         sg.InputText('-45', key='meridiano', size=(5, 1), justification='center')],
+        [sg.Button('Otimizar'), sg.Button('Cancelar', disabled=True), sg.Button('Voltar')],
+        [sg.ProgressBar(100, orientation='h', size=(30, 10), key='-PROGRESSO-'),
+         sg.Text('', key='-STATUS-', size=(30, 1))]
     ]
 
-    info_window = sg.Window("Otimização", layout, modal=True)
+    info_window = sg.Window("Otimização", layout, modal=True, finalize=True)
+
+    # A otimização de um período longo pode levar muito tempo: ela roda em segundo plano e pode ser cancelada
+    executor = ExecutorTarefas(info_window)
+    tarefa = '-OTIMIZACAO-'
+
+    def em_execucao(executando):
+        info_window['Otimizar'].update(disabled=executando)
+        info_window['Cancelar'].update(disabled=not executando)
 
     while True:
         event, values = info_window.read()
         if event == sg.WINDOW_CLOSED or event == 'Voltar':
+            executor.encerrar()
             info_window.close()
             parent_window.un_hide()
             break
+        elif event == 'Otimizar':
+            try:
+                lat = float(values['latitude'])
+                long_local = float(values['longitude'])
+                long_meridiano = float(values['meridiano'])
+            except ValueError:
+                info_window['-STATUS-'].update('Valores inválidos para a localização.')
+                continue
+
+            em_execucao(True)
+            info_window['-PROGRESSO-'].update(0)
+            info_window['-STATUS-'].update('Otimizando...')
+            executor.submeter(tarefa, otimizar_periodo, values['inicio'], values['fim'], lat, long_local,
+                              long_meridiano)
+        elif event == 'Cancelar':
+            executor.cancelar(tarefa)
+        elif event == (tarefa, PROGRESSO):
+            info_window['-PROGRESSO-'].update(int(values[event] * 100))
+        elif event == (tarefa, CANCELADO):
+            em_execucao(False)
+            info_window['-PROGRESSO-'].update(0)
+            info_window['-STATUS-'].update('Otimização cancelada.')
+        elif event == (tarefa, ERRO):
+            em_execucao(False)
+            info_window['-STATUS-'].update(f'Erro: {values[event]}')
+        elif event == (tarefa, RESULTADO):
+            em_execucao(False)
+            inclinacoes, orientacoes, resultados = values[event]
+            i, j = np.unravel_index(np.argmax(resultados), resultados.shape)
+
+            info_window['-INCLINACAO-'].update(f'Melhor inclinação: {inclinacoes[i]} graus')
+            info_window['-ORIENTACAO-'].update(f'Melhor orientação: {orientacoes[j]} graus (em relação ao norte)')
+            info_window['-IRRADIANCIA-'].update(f'Irradiância total máxima: {resultados[i, j]:.2f} W/m² no\nperíodo')
+            info_window['-STATUS-'].update('Otimização concluída.')
+
+            # Substitui a figura estática pelo mapa de irradiância do período calculado
+            fig = criar_figura_irradiancia(inclinacoes, orientacoes, resultados)
+            fig.set_size_inches(6, 4.8)
+            info_window['-IMAGEM-'].update(visible=False)
+            draw_figure(info_window['-CANVAS-'].TKCanvas, fig)
 
 
 def integrate(parent_window):
+    import report_helper
+    from execucao import ExecutorTarefas, RESULTADO, ERRO
+    from funcao import plotar_grandezas_rede, chaves_resultados_rede
+
     layout = [
+        [sg.Text("DATA(DD/MM/AA): "), sg.InputText('01/11/19', key='data_input', size=(25, 1), justification='center')],
         [sg.Text("HORA(HH:MM): "), sg.InputText('12:00', key='hora_input', size=(25, 1), justification='center')],
 
         [sg.Text('Inclinação do painel (0° a 89°):', justification='center'),
@@ -447,68 +679,92 @@ def integrate(parent_window):
         except ValueError:
             return False
 
+    executor = ExecutorTarefas(window)
+    tarefa = '-INTEGRACAO-'
+
     while True:
         event, values = window.read()
         if event == sg.WINDOW_CLOSED:
             break
         elif event == 'Voltar':
+            executor.encerrar()
             window.close()
             parent_window.un_hide()  # Retorna ao menu principal
             break
         elif event == "Plotar":
-            data = '1/11/19'
+            data = values["data_input"]
             hora = values["hora_input"]
 
-            beta = float(values['beta'])
-            gamma_p = float(values['gamma_p'])
-            lat = float(values['latitude'])
-            long_local = float(values['longitude'])
-            long_meridiano = float(values['meridiano'])
-
-            canvas_widget = window['-CANVAS-CUSTOM-'].TKCanvas
-
-            temperatura_cel, actual_irradiance, angulos_irradiancia, potencia_desejada, potencia_gerada_modulo, quantidade_paineis, short_circuit_current, open_circuit_voltage, temperature_current_coefficient, series_resistance, shunt_resistance, diode_quality_factor, number_of_series_connected_cells = HIKU7(
-                canvas_widget, data, hora, beta, gamma_p, lat, long_local, long_meridiano)
+            try:
+                beta = float(values['beta'])
+                gamma_p = float(values['gamma_p'])
+                lat = float(values['latitude'])
+                long_local = float(values['longitude'])
+                long_meridiano = float(values['meridiano'])
+            except ValueError:
+                sg.popup('Dados inseridos incorretos.', title='Erro')
+                continue
 
             if are_valid_inputs(values):
-                Pmed = potencia_gerada_modulo
                 Ang = float(values['Ang'])
                 Amp = float(values['Amp'])
 
-                # Chama a função para calcular resultados
-                pt_max, pt_media, pt_min, media_pr, Vfv, pfv, amplitude_tensao, amplitude_corrente, pfv_max, pfv_min, pfv_media, amplitude_tensao_fotovoltaico, amplitude_corrente_fotovoltaico = calcular_resultados(
-                    canvas_widget, Pmed, Amp, Ang, False)
-
-                # Atualiza o texto dos resultados
-                resultados_texto = (
-                    f"Informações sobre o painel:\n"
-                    f"Hora da Medição: {hora}\n"
-                    f"Temperatura (°C): {temperatura_cel:.2f}\n"
-                    f"Irradiância Atual (W/m²): {actual_irradiance:.2f}\n"
-                    f"Ângulo de Incidência (°): {angulos_irradiancia['Ângulo de Incidência']:.2f}\n"
-                    f"Irradiância Incidente (W/m²): {angulos_irradiancia['Irradiância Incidente']:.2f}\n"
-                    f"Potência Gerada pelo Módulo (W): {potencia_gerada_modulo:.2f}\n"
-                    f"Quantidade de Painéis: {quantidade_paineis:.2f}\n\n"
-
-                    "Informações sobre o controle:\n"
-                    f"Potência total máxima Rede: {pt_max:.2f}\n"
-                    f"Potência total mínima Rede: {pt_min:.2f}\n"
-                    f"Média da potência total Rede: {pt_media:.2f}\n"
-                    f"Média da potência reativa Rede: {media_pr:.2f}\n"
-                    f"Amplitude máxima da tensão Rede: {amplitude_tensao:.2f}\n"
-                    f"Amplitude máxima da corrente Rede: {amplitude_corrente:.2f}\n"
-                    f"Potência fotovoltaica máxima: {pfv_max:.2f}\n"
-                    f"Potência fotovoltaica mínima: {pfv_min:.2f}\n"
-                    f"Média da potência fotovoltaica: {pfv_media:.2f}\n"
-                    f"Amplitude máxima da tensão fotovoltaica: {amplitude_tensao_fotovoltaico:.2f}\n"
-                    f"Amplitude máxima da corrente fotovoltaica: {amplitude_corrente_fotovoltaico:.2f}\n"
-                )
-                window['-RESULTADOS-'].update(resultados_texto)
+                # Painel e rede são calculados em segundo plano; os gráficos são desenhados quando o resultado chegar
+                window['Plotar'].update(disabled=True)
+                window['-RESULTADOS-'].update('Calculando...')
+                executor.submeter(tarefa, calcular_integracao, data, hora, beta, gamma_p, lat, long_local,
+                                  long_meridiano, Amp, Ang)
             else:
                 window['-RESULTADOS-'].update("Por favor, preencha todos os campos com valores numéricos válidos!")
+        elif event == (tarefa, ERRO):
+            window['Plotar'].update(disabled=False)
+            window['-RESULTADOS-'].update('')
+            sg.popup('Dados inseridos incorretos.', title='Erro')
+            print(f'Dados inseridos incorretos! {values[event]}')
+        elif event == (tarefa, RESULTADO):
+            window['Plotar'].update(disabled=False)
+            resultados, curva, maximum_power_point, grandezas = values[event]
+
+            canvas_widget = window['-CANVAS-CUSTOM-'].TKCanvas
+            report_helper.plot_result(curva, canvas_widget, maximum_power_point)
+            plotar_grandezas_rede(canvas_widget, grandezas, False)
+
+            temperatura_cel, actual_irradiance, angulos_irradiancia, potencia_desejada, potencia_gerada_modulo, quantidade_paineis, short_circuit_current, open_circuit_voltage, temperature_current_coefficient, series_resistance, shunt_resistance, diode_quality_factor, number_of_series_connected_cells = resultados
+            pt_max, pt_media, pt_min, media_pr, Vfv, pfv, amplitude_tensao, amplitude_corrente, pfv_max, pfv_min, pfv_media, amplitude_tensao_fotovoltaico, amplitude_corrente_fotovoltaico = (
+                grandezas[chave] for chave in chaves_resultados_rede)
+
+            # Atualiza o texto dos resultados
+            resultados_texto = (
+                f"Informações sobre o painel:\n"
+                f"Hora da Medição: {hora}\n"
+                f"Temperatura (°C): {temperatura_cel:.2f}\n"
+                f"Irradiância Atual (W/m²): {actual_irradiance:.2f}\n"
+                f"Ângulo de Incidência (°): {angulos_irradiancia['Ângulo de Incidência']:.2f}\n"
+                f"Irradiância Incidente (W/m²): {angulos_irradiancia['Irradiância Incidente']:.2f}\n"
+                f"Potência Gerada pelo Módulo (W): {potencia_gerada_modulo:.2f}\n"
+                f"Quantidade de Painéis: {quantidade_paineis:.2f}\n\n"
+
+                "Informações sobre o controle:\n"
+                f"Potência total máxima Rede: {pt_max:.2f}\n"
+                f"Potência total mínima Rede: {pt_min:.2f}\n"
+                f"Média da potência total Rede: {pt_media:.2f}\n"
+                f"Média da potência reativa Rede: {media_pr:.2f}\n"
+                f"Amplitude máxima da tensão Rede: {amplitude_tensao:.2f}\n"
+                f"Amplitude máxima da corrente Rede: {amplitude_corrente:.2f}\n"
+                f"Potência fotovoltaica máxima: {pfv_max:.2f}\n"
+                f"Potência fotovoltaica mínima: {pfv_min:.2f}\n"
+                f"Média da potência fotovoltaica: {pfv_media:.2f}\n"
+                f"Amplitude máxima da tensão fotovoltaica: {amplitude_tensao_fotovoltaico:.2f}\n"
+                f"Amplitude máxima da corrente fotovoltaica: {amplitude_corrente_fotovoltaico:.2f}\n"
+            )
+            window['-RESULTADOS-'].update(resultados_texto)
+    executor.encerrar()
     window.close()
 
     # -----------------------------------------------
 
 
-main_menu()
+# Os processos de cálculo (ExecutorTarefas e a otimização por período) reimportam este módulo ao iniciar
+# com spawn; a interface só deve ser aberta pelo processo principal.
+if __name__ == '__main__':
+    main_menu()
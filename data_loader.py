@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+# URL padrão da planilha de medições (exportação CSV do Google Sheets)
+url = "https://docs.google.com/spreadsheets/d/1W1V5ExxROoVLTQAdsYKVv98rweN_bEoSwFwct9DN3Ao/gviz/tq?tqx=out:csv"
+
+# A fonte pode ser trocada por um arquivo CSV local através da variável de ambiente FOTOVOLTAICA_DADOS
+fonte_padrao = os.environ.get('FOTOVOLTAICA_DADOS', url)
+
+# Diretório do cache em disco e validade (em horas) do cache de fontes remotas
+diretorio_cache = os.environ.get('FOTOVOLTAICA_CACHE',
+                                 os.path.join(os.path.expanduser('~'), '.cache', 'fotovoltaica'))
+validade_cache_horas = float(os.environ.get('FOTOVOLTAICA_CACHE_VALIDADE', 24))
+
+# Colunas numéricas que vêm da planilha como string com vírgula decimal
+colunas_numericas = ['Radiação', 'Temp_Cel', 'Temp_Amb', 'Tensao_S1_Avg', 'Corrente_S1_Avg',
+                     'Potencia_S1_Avg', 'Tensao_S2_Avg', 'Corrente_S2_Avg', 'Potencia_S2_Avg',
+                     'Potencia_FV_Avg', 'Demanda_Avg', 'FP_FV_Avg', 'Tensao_Rede_Avg']
+
+# Incrementar quando o formato do cache mudar, para invalidar caches antigos
+versao_cache = 1
+
+# DataFrames já carregados neste processo, por fonte
+_dados_carregados = {}
+
+# Travas por fonte: a carga em segundo plano e os menus podem pedir a mesma fonte ao mesmo tempo, e só uma
+# thread deve ler (ou baixar) o CSV e gravar o cache. Reentrantes porque obter_memmap chama carregar_dados.
+_travas_fontes = {}
+_trava_travas = threading.Lock()
+
+
+# Função para obter a trava de uma fonte
+def _trava_fonte(fonte):
+    with _trava_travas:
+        return _travas_fontes.setdefault(fonte, threading.RLock())
+
+
+# Função para verificar se a fonte é remota
+def _fonte_remota(fonte):
+    return fonte.startswith(('http://', 'https://'))
+
+
+# Função para obter o caminho do cache de uma fonte
+def _caminho_cache(fonte):
+    chave = hashlib.sha1(fonte.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(diretorio_cache, f'dados_{chave}.npz')
+
+
+# Função para converter a coluna 'Data_Hora' para datetime
+def _converter_data_hora(df):
+    if 'Data_Hora' in df.columns:
+        df['Data_Hora'] = pd.to_datetime(df['Data_Hora'], format='%d/%m/%y %H:%M', errors='coerce')
+    return df
+
+
+# Função para converter as colunas numéricas já lidas com decimal=','. Colunas com algum valor não numérico
+# chegam como texto e só elas são convertidas (valores inválidos viram NaN); as demais apenas mudam de tipo.
+def _converter_numericas(df, float32=False):
+    tipo = np.float32 if float32 else np.float64
+    for coluna in colunas_numericas:
+        if coluna not in df.columns:
+            continue
+        if not pd.api.types.is_numeric_dtype(df[coluna]):
+            df[coluna] = pd.to_numeric(df[coluna].astype(str).str.replace(',', '.'), errors='coerce')
+        if df[coluna].dtype != tipo:
+            df[coluna] = df[coluna].astype(tipo)
+    return df
+
+
+# Função para ler e converter a planilha de medições numa única leitura da fonte.
+# Os valores com vírgula decimal são convertidos diretamente pelo leitor (decimal=','), sem cópias em string.
+def ler_csv(fonte, float32=False):
+    df = pd.read_csv(fonte, decimal=',')
+    return _converter_data_hora(_converter_numericas(df, float32))
+
+
+# Função para ler a planilha em blocos, com memória limitada independentemente do tamanho do arquivo.
+# Cada bloco é um DataFrame já convertido como em ler_csv; colunas permite ler apenas as colunas necessárias.
+def ler_csv_em_blocos(fonte=None, tamanho_bloco=100000, float32=False, colunas=None):
+    fonte = fonte or fonte_padrao
+    leitor = pd.read_csv(fonte, decimal=',', usecols=colunas, chunksize=tamanho_bloco)
+    with leitor:
+        for bloco in leitor:
+            yield _converter_data_hora(_converter_numericas(bloco, float32))
+
+
+# Função para salvar o DataFrame no cache em disco (uma matriz NumPy por coluna)
+def salvar_cache(df, fonte, modificacao):
+    os.makedirs(diretorio_cache, exist_ok=True)
+
+    colunas = {}
+    for indice, coluna in enumerate(df.columns):
+        valores = df[coluna].to_numpy()
+        if valores.dtype == object:
+            valores = df[coluna].astype(str).to_numpy(dtype=str)
+        colunas[f'c{indice}'] = valores
+
+    metadados = {
+        'versao': versao_cache,
+        'fonte': fonte,
+        'modificacao': modificacao,
+        'colunas': list(df.columns),
+    }
+
+    caminho = _caminho_cache(fonte)
+    temporario = caminho + '.tmp.npz'
+    np.savez(temporario, _metadados=np.array(json.dumps(metadados)), **colunas)
+    # Troca atômica para que outro processo nunca leia um cache incompleto
+    os.replace(temporario, caminho)
+
+
+# Função para ler o cache em disco; retorna (DataFrame, metadados) ou (None, None)
+def ler_cache(fonte):
+    caminho = _caminho_cache(fonte)
+    if not os.path.exists(caminho):
+        return None, None
+
+    try:
+        with np.load(caminho, allow_pickle=False) as arquivo:
+            metadados = json.loads(str(arquivo['_metadados']))
+            if metadados.get('versao') != versao_cache or metadados.get('fonte') != fonte:
+                return None, None
+            df = pd.DataFrame({coluna: arquivo[f'c{indice}']
+                               for indice, coluna in enumerate(metadados['colunas'])})
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        print(f"Cache inválido em {caminho}: {e}. Ignorando.")
+        return None, None
+
+    return df, metadados
+
+
+# Função para verificar se o cache ainda corresponde à fonte
+def _cache_atualizado(fonte, metadados):
+    if _fonte_remota(fonte):
+        return time.time() - metadados['modificacao'] < validade_cache_horas * 3600
+    return os.path.exists(fonte) and os.path.getmtime(fonte) == metadados['modificacao']
+
+
+# Função para carregar os dados de medição uma única vez por processo
+def carregar_dados(fonte=None, atualizar=False):
+    fonte = fonte or fonte_padrao
+
+    if not atualizar and fonte in _dados_carregados:
+        return _dados_carregados[fonte]
+
+    with _trava_fonte(fonte):
+        # Outra thread pode ter carregado a fonte enquanto esta esperava pela trava
+        if not atualizar and fonte in _dados_carregados:
+            return _dados_carregados[fonte]
+        return _carregar_dados(fonte, atualizar)
+
+
+# Função para carregar a fonte (do cache em disco ou do CSV), chamada com a trava da fonte
+def _carregar_dados(fonte, atualizar):
+    df, metadados = (None, None) if atualizar else ler_cache(fonte)
+
+    if df is None or not _cache_atualizado(fonte, metadados):
+        try:
+            modificacao = time.time() if _fonte_remota(fonte) else os.path.getmtime(fonte)
+            df = ler_csv(fonte)
+        except Exception as e:
+            # Sem acesso à fonte (ou arquivo local removido): usar o cache mesmo que esteja desatualizado
+            if df is None:
+                raise
+            print(f"Não foi possível carregar os dados de {fonte}: {e}. Usando o cache local.")
+        else:
+            try:
+                salvar_cache(df, fonte, modificacao)
+            except OSError as e:
+                print(f"Não foi possível gravar o cache dos dados: {e}")
+
+    _dados_carregados[fonte] = df
+    return df
+
+
+# Função para obter o diretório padrão do armazenamento mapeado em memória de uma fonte
+def diretorio_memmap(fonte=None):
+    fonte = fonte or fonte_padrao
+    return os.path.splitext(_caminho_cache(fonte))[0] + '_memmap'
+
+
+# Função para exportar as colunas numéricas (e 'Data_Hora') como arquivos .npy ordenados por data e hora,
+# que podem ser abertos mapeados em memória e compartilhados entre processos sem cópia
+def exportar_memmap(diretorio, df=None, colunas=None):
+    if df is None:
+        df = carregar_dados()
+    if colunas is None:
+        colunas = ['Data_Hora'] + [coluna for coluna in colunas_numericas if coluna in df.columns]
+
+    data_hora = df['Data_Hora'].to_numpy().astype('datetime64[ns]')
+    validos = np.flatnonzero(~np.isnat(data_hora))
+    ordem = validos[np.argsort(data_hora[validos], kind='stable')]
+
+    os.makedirs(diretorio, exist_ok=True)
+    arquivos = {}
+    for indice, coluna in enumerate(colunas):
+        valores = df[coluna].to_numpy()
+        if coluna == 'Data_Hora':
+            valores = valores.astype('datetime64[ns]')
+        arquivos[coluna] = f'c{indice}.npy'
+        np.save(os.path.join(diretorio, arquivos[coluna]), np.ascontiguousarray(valores[ordem]))
+
+    # Os metadados são gravados por último: sem eles o diretório é considerado incompleto
+    with open(os.path.join(diretorio, 'metadados.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump({'versao': versao_cache, 'linhas': len(ordem), 'arquivos': arquivos}, arquivo)
+
+    return diretorio
+
+
+# Função para abrir as colunas exportadas como matrizes mapeadas em memória (somente leitura)
+def abrir_memmap(diretorio, colunas=None):
+    with open(os.path.join(diretorio, 'metadados.json'), encoding='utf-8') as arquivo:
+        metadados = json.load(arquivo)
+    if metadados.get('versao') != versao_cache:
+        raise ValueError(f"Versão incompatível do armazenamento em {diretorio}")
+
+    arquivos = metadados['arquivos']
+    if colunas is None:
+        colunas = list(arquivos)
+    return {coluna: np.load(os.path.join(diretorio, arquivos[coluna]), mmap_mode='r') for coluna in colunas}
+
+
+# Função para obter o armazenamento mapeado em memória da fonte, exportando-o se não existir
+# ou se for mais antigo que o cache dos dados
+def obter_memmap(fonte=None, colunas=None):
+    fonte = fonte or fonte_padrao
+    diretorio = diretorio_memmap(fonte)
+    metadados = os.path.join(diretorio, 'metadados.json')
+
+    # O armazenamento acompanha o cache dos dados (e o próprio arquivo, no caso de fontes locais)
+    referencias = [_caminho_cache(fonte)] + ([] if _fonte_remota(fonte) else [fonte])
+    with _trava_fonte(fonte):
+        if not os.path.exists(metadados) or any(not os.path.exists(referencia) or
+                                                os.path.getmtime(metadados) < os.path.getmtime(referencia)
+                                                for referencia in referencias):
+            exportar_memmap(diretorio, carregar_dados(fonte))
+
+    return abrir_memmap(diretorio, colunas)
+
+
+# Função para fatiar matrizes ordenadas por 'Data_Hora' no intervalo [inicio, fim)
+def fatiar_intervalo(dados, inicio, fim):
+    data_hora = dados['Data_Hora']
+    i, j = np.searchsorted(data_hora, np.array([pd.Timestamp(inicio), pd.Timestamp(fim)], dtype='datetime64[ns]'))
+    return {coluna: valores[i:j] for coluna, valores in dados.items()}
@@ -0,0 +1,106 @@
+import inspect
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+# Sufixos dos eventos enviados à janela. Cada evento é a tupla (chave da tarefa, sufixo), e o valor é:
+#   RESULTADO - o valor retornado pela função
+#   PROGRESSO - fração concluída (0 a 1), quando a função informa o progresso
+#   ERRO      - a exceção levantada pela função
+#   CANCELADO - None
+RESULTADO = 'resultado'
+PROGRESSO = 'progresso'
+ERRO = 'erro'
+CANCELADO = 'cancelado'
+
+
+# Exceção que funções cooperativas podem levantar ao perceber o pedido de cancelamento
+class TarefaCancelada(Exception):
+    pass
+
+
+# Executa cálculos pesados fora do laço de eventos do PySimpleGUI e devolve os resultados à janela
+# com window.write_event_value, mantendo a interface responsiva.
+# Funções que aceitam os argumentos nomeados 'progresso' e/ou 'cancelamento' recebem, respectivamente,
+# uma função progresso(fracao) e um threading.Event que indica o pedido de cancelamento.
+class ExecutorTarefas(object):
+
+    def __init__(self, window, max_workers=None, processos=False):
+        self.window = window
+        # Em processos não há como repassar progresso nem cancelamento cooperativo, apenas o resultado
+        self.processos = processos
+        if processos:
+            # spawn: um fork copiaria as threads e o estado do Tk do processo da interface
+            self.__executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context('spawn'))
+        else:
+            self.__executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.__tarefas = {}
+        self.__trava = threading.Lock()
+
+    def submeter(self, chave, funcao, *args, **kwargs):
+        # Uma nova tarefa com a mesma chave cancela a anterior
+        self.cancelar(chave)
+
+        cancelamento = threading.Event()
+        if not self.processos:
+            parametros = inspect.signature(funcao).parameters
+            if 'progresso' in parametros:
+                kwargs['progresso'] = lambda fracao: self.__enviar(chave, PROGRESSO, fracao, cancelamento)
+            if 'cancelamento' in parametros:
+                kwargs['cancelamento'] = cancelamento
+
+        futuro = self.__executor.submit(funcao, *args, **kwargs)
+        with self.__trava:
+            self.__tarefas[chave] = (futuro, cancelamento)
+        futuro.add_done_callback(lambda f: self.__concluir(chave, f, cancelamento))
+        return futuro
+
+    def cancelar(self, chave):
+        with self.__trava:
+            tarefa = self.__tarefas.pop(chave, None)
+        if tarefa is None:
+            return False
+
+        futuro, cancelamento = tarefa
+        cancelamento.set()
+        # Tarefas que ainda não começaram são descartadas; as que estão em execução param na próxima verificação
+        futuro.cancel()
+        self.__enviar(chave, CANCELADO, None)
+        return True
+
+    def em_execucao(self, chave):
+        with self.__trava:
+            return chave in self.__tarefas
+
+    def encerrar(self):
+        with self.__trava:
+            chaves = list(self.__tarefas)
+        for chave in chaves:
+            self.cancelar(chave)
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def __concluir(self, chave, futuro, cancelamento):
+        with self.__trava:
+            if self.__tarefas.get(chave, (None,))[0] is futuro:
+                del self.__tarefas[chave]
+
+        # Resultados de tarefas canceladas são descartados (o evento CANCELADO já foi enviado)
+        if cancelamento.is_set():
+            return
+        try:
+            resultado = futuro.result()
+        except (CancelledError, TarefaCancelada):
+            return
+        except Exception as e:
+            self.__enviar(chave, ERRO, e)
+        else:
+            self.__enviar(chave, RESULTADO, resultado)
+
+    def __enviar(self, chave, tipo, valor, cancelamento=None):
+        if cancelamento is not None and cancelamento.is_set():
+            return
+        try:
+            self.window.write_event_value((chave, tipo), valor)
+        except Exception:
+            # A janela pode ter sido fechada enquanto a tarefa terminava
+            pass
@@ -1,14 +1,21 @@
 import numpy as np
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
-import pandas as pd
+from matplotlib.animation import FuncAnimation
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 
-# Carregar os dados para a primeira funcionalidade
-url = "https://docs.google.com/spreadsheets/d/1W1V5ExxROoVLTQAdsYKVv98rweN_bEoSwFwct9DN3Ao/gviz/tq?tqx=out:csv"
-df = pd.read_csv(url)
-df['Data_Hora'] = pd.to_datetime(df['Data_Hora'], format='%d/%m/%y %H:%M')
-df['Radiação'] = df['Radiação'].str.replace(',', '.').astype(float)
-df['Temp_Cel'] = df['Temp_Cel'].str.replace(',', '.').astype(float)
+from data_loader import carregar_dados
+from geometria_solar import calcular_geometria_solar
+from table_data import obter_dados_hora
+
+
+# Os dados da primeira funcionalidade são carregados no primeiro acesso a funcao.df
+def __getattr__(nome):
+    if nome == 'df':
+        return carregar_dados()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
 
 
 # Função para desenhar o gráfico no canvas
@@ -24,43 +31,90 @@ def draw_figure(canvas, figure, remove_last_graphics=True):
     return figure_canvas_agg
 
 
-# Função para plotar dados da primeira funcionalidade
-def plot_hourly_data(selected_hour, selected_minute, canvas):
-    start_time = pd.Timestamp('2019-11-01 00:00:00') + pd.Timedelta(hours=selected_hour)
-    end_time = start_time + pd.Timedelta(hours=1)
-    filtered_data = df[(df['Data_Hora'] >= start_time) & (df['Data_Hora'] < end_time)]
-
-    if not filtered_data.empty and selected_minute < len(filtered_data):
-        temperatura_atual = filtered_data['Temp_Cel'].iloc[selected_minute]
-        irradiancia_atual = filtered_data['Radiação'].iloc[selected_minute]
-
-        fig, axs = plt.subplots(1, 2, figsize=(18, 10))
-
-        # Gráfico de Radiação
-        axs[0].plot(filtered_data['Data_Hora'], filtered_data['Radiação'], label='Radiação')
-        axs[0].scatter(filtered_data['Data_Hora'].iloc[selected_minute], irradiancia_atual, color='red')
-        axs[0].annotate(f"{irradiancia_atual:.2f} W/m²",
-                        xy=(filtered_data['Data_Hora'].iloc[selected_minute], irradiancia_atual),
-                        xytext=(5, 5), textcoords='offset points', fontsize=10, color='red')
-        axs[0].set_title('Radiação')
-        axs[0].set_xlabel('Data e Hora')
-        axs[0].set_ylabel('Radiação (W/m²)')
-        axs[0].tick_params(axis='x', rotation=45)
-
-        # Gráfico de Temperatura
-        axs[1].plot(filtered_data['Data_Hora'], filtered_data['Temp_Cel'], label='Temperatura')
-        axs[1].scatter(filtered_data['Data_Hora'].iloc[selected_minute], temperatura_atual, color='red')
-        axs[1].annotate(f"{temperatura_atual:.2f} °C",
-                        xy=(filtered_data['Data_Hora'].iloc[selected_minute], temperatura_atual),
-                        xytext=(5, 5), textcoords='offset points', fontsize=10, color='red')
-        axs[1].set_title('Temperatura')
-        axs[1].set_xlabel('Data e Hora')
-        axs[1].set_ylabel('Temperatura (°C)')
-        axs[1].tick_params(axis='x', rotation=45)
-
-        plt.tight_layout()
-        draw_figure(canvas, fig)
-        plt.close(fig)
+# Gráfico persistente da primeira funcionalidade: a figura e o FigureCanvasTkAgg são criados uma única vez por
+# Canvas. Ao trocar de hora apenas os dados das linhas são substituídos (set_data) e a figura é redesenhada;
+# ao mover o minuto, só o ponto destacado e as anotações são redesenhados sobre o fundo guardado (blitting).
+class GraficoHorario(object):
+
+    def __init__(self, canvas, figsize=(18, 10)):
+        # Figura fora do pyplot: pertence apenas ao Canvas e não é fechada entre atualizações
+        self.fig = Figure(figsize=figsize)
+        self.axs = self.fig.subplots(1, 2)
+        self.linhas = []
+        self.pontos = []
+        self.anotacoes = []
+
+        titulos = (('Radiação', 'Radiação (W/m²)'), ('Temperatura', 'Temperatura (°C)'))
+        for ax, (titulo, rotulo) in zip(self.axs, titulos):
+            ax.xaxis_date()
+            self.linhas.append(ax.plot([], [], label=titulo)[0])
+            # Elementos animados não entram no desenho completo; são desenhados por cima do fundo guardado
+            self.pontos.append(ax.plot([], [], 'o', color='red', animated=True)[0])
+            self.anotacoes.append(ax.annotate('', xy=(0, 0), xytext=(5, 5), textcoords='offset points',
+                                              fontsize=10, color='red', animated=True))
+            ax.set_title(titulo)
+            ax.set_xlabel('Data e Hora')
+            ax.set_ylabel(rotulo)
+            ax.tick_params(axis='x', rotation=45)
+
+        self.chave = None
+        self.__fundo = None
+        self.figure_canvas_agg = draw_figure(canvas, self.fig)
+        self.figure_canvas_agg.mpl_connect('draw_event', self.__ao_desenhar)
+
+    # Função para mostrar uma janela de dados; chave identifica a janela (dados iguais não são recarregados)
+    def mostrar(self, chave, data_hora, radiacao, temperatura, selected_minute):
+        x = mdates.date2num(np.asarray(data_hora, dtype='datetime64[ns]'))
+        self.__destacar(x[selected_minute], (radiacao[selected_minute], temperatura[selected_minute]))
+
+        if chave != self.chave or self.__fundo is None:
+            for ax, linha, y in zip(self.axs, self.linhas, (radiacao, temperatura)):
+                linha.set_data(x, y)
+                ax.relim()
+                ax.autoscale_view()
+            self.chave = chave
+            self.fig.tight_layout()
+            # O redesenho completo dispara draw_event, que guarda o novo fundo e desenha o destaque
+            self.figure_canvas_agg.draw()
+        else:
+            self.figure_canvas_agg.restore_region(self.__fundo)
+            self.__desenhar_destaques()
+            self.figure_canvas_agg.blit(self.fig.bbox)
+
+    def __destacar(self, x, valores):
+        for ponto, anotacao, valor, unidade in zip(self.pontos, self.anotacoes, valores, ('W/m²', '°C')):
+            ponto.set_data([x], [valor])
+            anotacao.xy = (x, valor)
+            anotacao.set_text(f"{valor:.2f} {unidade}")
+
+    def __desenhar_destaques(self):
+        for artista in self.pontos + self.anotacoes:
+            self.fig.draw_artist(artista)
+
+    def __ao_desenhar(self, evento):
+        self.__fundo = self.figure_canvas_agg.copy_from_bbox(self.fig.bbox)
+        self.__desenhar_destaques()
+
+
+# Gráficos persistentes por Canvas (removidos quando o Canvas é destruído)
+_graficos_horarios = {}
+
+
+# Função para obter (ou criar) o gráfico persistente de um Canvas
+def obter_grafico_horario(canvas):
+    if canvas not in _graficos_horarios:
+        _graficos_horarios[canvas] = GraficoHorario(canvas)
+        canvas.bind('<Destroy>', lambda evento: _graficos_horarios.pop(canvas, None), add='+')
+    return _graficos_horarios[canvas]
+
+
+# Função para plotar dados da primeira funcionalidade (data no formato dd/mm/aa)
+def plot_hourly_data(selected_hour, selected_minute, canvas, data_selecionada='01/11/19'):
+    dados_hora = obter_dados_hora(data_selecionada, selected_hour, ['Data_Hora', 'Radiação', 'Temp_Cel'])
+
+    if selected_minute < len(dados_hora['Data_Hora']):
+        obter_grafico_horario(canvas).mostrar((data_selecionada, selected_hour), dados_hora['Data_Hora'],
+                                              dados_hora['Radiação'], dados_hora['Temp_Cel'], selected_minute)
 
 
 # Funções de cálculo
@@ -73,39 +127,22 @@ def rad_to_deg(radians):
 
 
 def calculate_solar_parameters(data_hora, irradiancia_global, beta, gamma_p, lat, long_local, long_meridiano):
-    dia = data_hora.timetuple().tm_yday
-    B = (360 / 365) * (dia - 81)
-    EoT = 9.87 * np.sin(np.radians(2 * B)) - 7.53 * np.cos(np.radians(B)) - 1.5 * np.sin(np.radians(B))
-    EoT /= 60
-
-    hora_local = data_hora.hour + data_hora.minute / 60
-    hora_solar = hora_local - ((long_local - long_meridiano) / 15) + EoT
-
-    declinacao_solar = 23.45 * np.sin(np.radians(360 * (284 + dia) / 365))
-    omega = 15 * (hora_solar - 12)
-
-    theta_z = np.degrees(np.arccos(np.sin(np.radians(lat)) * np.sin(np.radians(declinacao_solar)) +
-                                   np.cos(np.radians(lat)) * np.cos(np.radians(declinacao_solar)) * np.cos(
-        np.radians(omega))))
-
-    gamma_solar = np.degrees(np.arctan2(np.sin(np.radians(omega)),
-                                        (np.cos(np.radians(omega)) * np.sin(np.radians(lat)) -
-                                         np.tan(np.radians(declinacao_solar)) * np.cos(np.radians(lat)))))
+    geometria = calcular_geometria_solar(data_hora, irradiancia_global, beta, gamma_p, lat, long_local, long_meridiano)
+    return (geometria["Hora Solar"][()], geometria["Ângulo de Incidência"][()],
+            geometria["Irradiância Incidente"][()])
 
-    theta_i = np.degrees(
-        np.arccos(np.sin(np.radians(theta_z)) * np.cos(np.radians(gamma_p - gamma_solar)) * np.sin(np.radians(beta)) +
-                  np.cos(np.radians(theta_z)) * np.cos(np.radians(beta))))
 
-    G_inc = irradiancia_global * np.cos(np.radians(theta_i))
-    return hora_solar, theta_i, G_inc
-
-
-def calcular_resultados(canvas, Pmed, Amp, ang, remove_last_graphics=True):
+# Função que apenas calcula as formas de onda e as grandezas da rede (sem gráficos).
+# Pmed, Amp e ang podem ser matrizes: elas são combinadas por broadcasting, as formas de onda ganham um último
+# eixo com as 200 amostras no tempo e as grandezas resumidas têm a forma combinada das entradas.
+def calcular_grandezas_rede(Pmed, Amp, ang):
     # Definindo variáveis
     f = 60
     w = 2 * np.pi * f
     t = np.linspace(0, 2 * (1 / f), 200)
 
+    Pmed, Amp, ang = np.broadcast_arrays(*(np.asarray(valor, dtype=float)[..., np.newaxis]
+                                           for valor in (Pmed, Amp, ang)))
     Vp = Amp * np.sqrt(2)
     Ip = 2 * Pmed / Vp
 
@@ -116,27 +153,67 @@ def calcular_resultados(canvas, Pmed, Amp, ang, remove_last_graphics=True):
 
     # Potências
     pt = vt * it
-    pt_max = np.max(pt)
-    pt_media = np.mean(pt)
-    pt_min = np.min(pt)
+    pt_max = np.max(pt, axis=-1)
+    pt_media = np.mean(pt, axis=-1)
+    pt_min = np.min(pt, axis=-1)
 
     # Cálculo da potência reativa
     pa = Vp * Ip / 2 * np.cos(2 * w * t) * np.cos(ph) + Vp * Ip / 2 * np.cos(ph)
     pr = -Vp * Ip / 2 * np.sin(2 * w * t) * np.sin(ph)
-    amplitude_tensao = np.max(np.abs(vt))
-    amplitude_corrente = np.max(np.abs(it))
+    amplitude_tensao = np.max(np.abs(vt), axis=-1)
+    amplitude_corrente = np.max(np.abs(it), axis=-1)
 
     # Potência fotovoltaica
     L = 50e-3
-    VL = -np.max(it) * (w * L) * np.sin(w * t)
+    VL = -np.max(it, axis=-1, keepdims=True) * (w * L) * np.sin(w * t)
     Vfv = vt + VL
     pfv = Vfv * (-it)
 
-    pfv_max = np.max(pfv)
-    pfv_media = np.mean(pfv)
-    pfv_min = np.min(pfv)
-    amplitude_tensao_fotovoltaico = np.max(np.abs(Vfv))
-    amplitude_corrente_fotovoltaico = np.max(np.abs(-it))
+    pfv_max = np.max(pfv, axis=-1)
+    pfv_media = np.mean(pfv, axis=-1)
+    pfv_min = np.min(pfv, axis=-1)
+    amplitude_tensao_fotovoltaico = np.max(np.abs(Vfv), axis=-1)
+    amplitude_corrente_fotovoltaico = amplitude_corrente
+
+    return {
+        't': t, 'vt': vt, 'it': it, 'pt': pt, 'pa': pa, 'pr': pr, 'Vfv': Vfv, 'pfv': pfv,
+        'pt_max': pt_max, 'pt_media': pt_media, 'pt_min': pt_min, 'media_pr': np.mean(pr, axis=-1),
+        'amplitude_tensao': amplitude_tensao, 'amplitude_corrente': amplitude_corrente,
+        'pfv_max': pfv_max, 'pfv_min': pfv_min, 'pfv_media': pfv_media,
+        'amplitude_tensao_fotovoltaico': amplitude_tensao_fotovoltaico,
+        'amplitude_corrente_fotovoltaico': amplitude_corrente_fotovoltaico,
+    }
+
+
+# Grandezas resumidas (uma por ponto de operação), sem as formas de onda
+chaves_metricas_rede = ('pt_max', 'pt_media', 'pt_min', 'media_pr', 'amplitude_tensao', 'amplitude_corrente',
+                        'pfv_max', 'pfv_min', 'pfv_media', 'amplitude_tensao_fotovoltaico',
+                        'amplitude_corrente_fotovoltaico')
+
+
+# Função para varrer todas as combinações de potências, amplitudes e ângulos de fase (sem gráficos).
+# Retorna as grandezas resumidas com forma (potências, amplitudes, ângulos); os pontos são processados em blocos
+# para limitar a memória das formas de onda intermediárias.
+def varrer_grandezas_rede(potencias, amplitudes, angulos, tamanho_bloco=4096):
+    potencias, amplitudes, angulos = (np.atleast_1d(np.asarray(valores, dtype=float))
+                                      for valores in (potencias, amplitudes, angulos))
+    forma = (len(potencias), len(amplitudes), len(angulos))
+    P, A, G = (matriz.ravel() for matriz in np.meshgrid(potencias, amplitudes, angulos, indexing='ij'))
+
+    metricas = {chave: np.empty(P.size) for chave in chaves_metricas_rede}
+    for inicio in range(0, P.size, tamanho_bloco):
+        bloco = slice(inicio, inicio + tamanho_bloco)
+        grandezas = calcular_grandezas_rede(P[bloco], A[bloco], G[bloco])
+        for chave in chaves_metricas_rede:
+            metricas[chave][bloco] = grandezas[chave]
+
+    return {chave: valores.reshape(forma) for chave, valores in metricas.items()}
+
+
+# Função para desenhar as formas de onda calculadas por calcular_grandezas_rede (deve rodar na thread da interface)
+def plotar_grandezas_rede(canvas, grandezas, remove_last_graphics=True):
+    t, vt, it, pt = grandezas['t'], grandezas['vt'], grandezas['it'], grandezas['pt']
+    pa, pr, Vfv, pfv = grandezas['pa'], grandezas['pr'], grandezas['Vfv'], grandezas['pfv']
 
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(10, 5))
 
@@ -197,9 +274,18 @@ def calcular_resultados(canvas, Pmed, Amp, ang, remove_last_graphics=True):
     draw_figure(canvas, fig, remove_last_graphics)  # Desenha a figura no Canvas
     plt.close(fig)
 
-    return (pt_max, pt_media, pt_min, np.mean(pr), Vfv, pfv,
-            amplitude_tensao, amplitude_corrente, pfv_max, pfv_min, pfv_media,
-            amplitude_tensao_fotovoltaico, amplitude_corrente_fotovoltaico)
+
+def calcular_resultados(canvas, Pmed, Amp, ang, remove_last_graphics=True):
+    grandezas = calcular_grandezas_rede(Pmed, Amp, ang)
+    plotar_grandezas_rede(canvas, grandezas, remove_last_graphics)
+
+    return tuple(grandezas[chave] for chave in chaves_resultados_rede)
+
+
+# Ordem das grandezas na tupla retornada por calcular_resultados
+chaves_resultados_rede = ('pt_max', 'pt_media', 'pt_min', 'media_pr', 'Vfv', 'pfv',
+                          'amplitude_tensao', 'amplitude_corrente', 'pfv_max', 'pfv_min', 'pfv_media',
+                          'amplitude_tensao_fotovoltaico', 'amplitude_corrente_fotovoltaico')
 
 
 def draw_animate(canvas, figure):
@@ -215,72 +301,104 @@ def create_panel():
     return np.array([[1, -1, 0], [1, 1, 0], [-1, 1, 0], [-1, -1, 0]])
 
 
-# Função para rotacionar a placa
-def rotate_panel(panel, angle_z, angle_x):
-    theta_z = np.radians(-angle_z)
-    rotation_matrix_z = np.array([
-        [np.cos(theta_z), -np.sin(theta_z), 0],
-        [np.sin(theta_z), np.cos(theta_z), 0],
-        [0, 0, 1]
-    ])
-
-    theta_x = np.radians(angle_x)
-    rotation_matrix_x = np.array([
-        [1, 0, 0],
-        [0, np.cos(theta_x), -np.sin(theta_x)],
-        [0, np.sin(theta_x), np.cos(theta_x)]
-    ])
-
-    rotated_panel = panel @ rotation_matrix_z.T
-    rotated_panel = rotated_panel @ rotation_matrix_x.T
-
-    return rotated_panel
-
-
-# Variável global para a animação
-ani = None  # Inicializada como None
-
-
-def animate(i, angle_x, angle_z, panel, frames, ax, step):
-    ax.cla()  # Limpa o gráfico apenas durante a animação
-
-    # Definindo ângulos atuais com base no progresso
-    current_angle_x = angle_x * (i / frames)
-    current_angle_z = angle_z * (i / frames)
-
-    # Se atingir o último frame, não limpar mais e parar a animação
-    if i >= frames:
-        current_angle_x = angle_x
-        current_angle_z = angle_z
-        if ani:  # Parar a animação se `ani` estiver disponível
-            ani.event_source.stop()
-
-    # Rotaciona a placa solar
-    rotated_panel = rotate_panel(panel, current_angle_z, current_angle_x)
-
-    # Desenhar a placa solar
-    if np.all(np.isfinite(rotated_panel)):
-        ax.plot_trisurf(rotated_panel[:, 0], rotated_panel[:, 1], rotated_panel[:, 2], color='gray', alpha=0.7)
-
-    # Desenhar vértices e rótulos
-    for idx, (x, y, z) in enumerate(rotated_panel):
-        ax.scatter(x, y, z, color='black', s=25)
-        ax.text(x, y, z, str(idx + 1), color='black', fontsize=12, ha='center')
-
-    # Desenhar os eixos
-    ax.quiver(0, 0, 0, 2, 0, 0, color='blue', arrow_length_ratio=0.1)
-    ax.quiver(0, 0, 0, 0, 2, 0, color='green', arrow_length_ratio=0.1)
-    ax.quiver(0, 0, 0, 0, 0, 2, color='red', arrow_length_ratio=0.1)
-
-    # Configurações do gráfico
-    ax.set_xlabel('Eixo X')
-    ax.set_ylabel('Eixo Y')
-    ax.set_zlabel('Eixo Z')
-    ax.set_xlim(-2, 2)
-    ax.set_ylim(-2, 2)
-    ax.set_zlim(-1, 2)
-    ax.set_title(f"Inclinação Z: {current_angle_z:.1f}°, X: {current_angle_x:.1f}°")
-    ax.grid(True)
+# Função para rotacionar a placa em todos os quadros de uma só vez (um ângulo Z e um ângulo X por quadro).
+# Retorna as posições dos vértices com forma (quadros, vértices, 3): rotação em Z seguida da rotação em X.
+def rotate_panel_frames(panel, angles_z, angles_x):
+    theta_z = np.radians(-np.asarray(angles_z, dtype=float))
+    theta_x = np.radians(np.asarray(angles_x, dtype=float))
+    cos_z, sin_z = np.cos(theta_z), np.sin(theta_z)
+    cos_x, sin_x = np.cos(theta_x), np.sin(theta_x)
+    zeros, ones = np.zeros_like(theta_z), np.ones_like(theta_z)
+
+    rotation_matrices_z = np.stack([
+        np.stack([cos_z, -sin_z, zeros], axis=-1),
+        np.stack([sin_z, cos_z, zeros], axis=-1),
+        np.stack([zeros, zeros, ones], axis=-1)
+    ], axis=-2)
+    rotation_matrices_x = np.stack([
+        np.stack([ones, zeros, zeros], axis=-1),
+        np.stack([zeros, cos_x, -sin_x], axis=-1),
+        np.stack([zeros, sin_x, cos_x], axis=-1)
+    ], axis=-2)
+
+    # panel @ Rz.T @ Rx.T == panel @ (Rx @ Rz).T, para todos os quadros numa única operação
+    rotation_matrices = rotation_matrices_x @ rotation_matrices_z
+    return np.einsum('vj,fij->fvi', panel, rotation_matrices)
+
+
+# Animação da placa com elementos persistentes: eixos, setas, limites e grade são criados uma única vez, as posições
+# de todos os quadros são calculadas antes de começar e cada quadro só atualiza o polígono, os vértices e os rótulos
+# (com blitting, apenas esses elementos são redesenhados).
+class AnimacaoPainel(object):
+
+    def __init__(self, fig, ax, panel=None, frames=50, interval=30):
+        self.fig = fig
+        self.ax = ax
+        self.panel = create_panel() if panel is None else np.asarray(panel, dtype=float)
+        self.frames = frames
+        self.interval = interval
+        self.ani = None
+
+        # Desenhar os eixos
+        ax.quiver(0, 0, 0, 2, 0, 0, color='blue', arrow_length_ratio=0.1)
+        ax.quiver(0, 0, 0, 0, 2, 0, color='green', arrow_length_ratio=0.1)
+        ax.quiver(0, 0, 0, 0, 0, 2, color='red', arrow_length_ratio=0.1)
+
+        # Configurações do gráfico
+        ax.set_xlabel('Eixo X')
+        ax.set_ylabel('Eixo Y')
+        ax.set_zlabel('Eixo Z')
+        ax.set_xlim(-2, 2)
+        ax.set_ylim(-2, 2)
+        ax.set_zlim(-1, 2)
+        ax.grid(True)
+
+        # Elementos atualizados a cada quadro
+        self.superficie = Poly3DCollection([self.panel], color='gray', alpha=0.7)
+        ax.add_collection3d(self.superficie)
+        self.vertices = ax.plot(self.panel[:, 0], self.panel[:, 1], self.panel[:, 2], 'o', color='black',
+                                markersize=5)[0]
+        self.rotulos = [ax.text(x, y, z, str(idx + 1), color='black', fontsize=12, ha='center')
+                        for idx, (x, y, z) in enumerate(self.panel)]
+        # O título fica dentro da área dos eixos para ser atualizado junto com o blitting
+        self.titulo = ax.text2D(0.5, 0.95, '', transform=ax.transAxes, ha='center',
+                                 fontsize=plt.rcParams['axes.titlesize'])
+        self.posicoes = self.panel[np.newaxis]
+        self.angulos = np.zeros((1, 2))
+
+    # Função para iniciar (ou reiniciar) a animação até os ângulos finais
+    def iniciar(self, angle_x, angle_z):
+        self.parar()
+
+        progresso = np.arange(self.frames + 1) / self.frames
+        self.angulos = np.column_stack([angle_z * progresso, angle_x * progresso])
+        self.posicoes = rotate_panel_frames(self.panel, self.angulos[:, 0], self.angulos[:, 1])
+
+        self.ani = FuncAnimation(self.fig, self.quadro, frames=len(self.posicoes), interval=self.interval,
+                                 repeat=False, blit=True)
+        return self.ani
+
+    def parar(self):
+        if self.ani is not None and self.ani.event_source is not None:
+            self.ani.event_source.stop()
+        self.ani = None
+
+    # Função chamada pela FuncAnimation: atualiza os elementos do quadro i e os devolve para o blitting
+    def quadro(self, i):
+        rotated_panel = self.posicoes[i]
+        current_angle_z, current_angle_x = self.angulos[i]
+
+        if np.all(np.isfinite(rotated_panel)):
+            self.superficie.set_verts([rotated_panel])
+        # Sem um redesenho completo dos eixos, a projeção 3D do polígono precisa ser refeita aqui
+        self.superficie.do_3d_projection()
+
+        self.vertices.set_data_3d(rotated_panel[:, 0], rotated_panel[:, 1], rotated_panel[:, 2])
+        for rotulo, (x, y, z) in zip(self.rotulos, rotated_panel):
+            rotulo.set_position_3d((x, y, z))
+        self.titulo.set_text(f"Inclinação Z: {current_angle_z:.1f}°, X: {current_angle_x:.1f}°")
+
+        return [self.superficie, self.vertices, self.titulo] + self.rotulos
 
 
 def calcular_geracao_mensal(potencia_sistema, horas_sol_dia, eficiencia):
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+# Função para converter datas/horas (datetime, Timestamp, datetime64, DatetimeIndex ou matriz) em datetime64[m]
+def _para_datetime64(data_hora):
+    if hasattr(data_hora, 'to_numpy'):
+        data_hora = data_hora.to_numpy()
+    return np.asarray(data_hora, dtype='datetime64[m]')
+
+
+# Função para calcular a posição do sol (dependente apenas do tempo e da localização)
+def calcular_posicao_solar(data_hora, lat, long_local, long_meridiano, horario_verao=0):
+    data_hora = _para_datetime64(data_hora)
+    data = data_hora.astype('datetime64[D]')
+
+    # Dia do ano e hora local, sem passar por strptime/timetuple
+    dia = (data - data.astype('datetime64[Y]')).astype(np.int64) + 1
+    hora_local = (data_hora - data).astype(np.int64) / 60
+
+    # Determinando a equação do tempo (em horas)
+    B = np.radians((360 / 365) * (dia - 81))
+    EoT = (9.87 * np.sin(2 * B) - 7.53 * np.cos(B) - 1.5 * np.sin(B)) / 60
+
+    # Calculando a hora solar
+    hora_solar = hora_local - ((long_local - long_meridiano) / 15) + EoT + horario_verao
+
+    # Calculando a declinação solar e o ângulo horário
+    declinacao_solar = np.radians(23.45 * np.sin(np.radians(360 * (284 + dia) / 365)))
+    omega = np.radians(15 * (hora_solar - 12))
+    phi = np.radians(lat)
+
+    # Calculando o ângulo zenital do sol
+    cos_theta_z = np.sin(phi) * np.sin(declinacao_solar) + np.cos(phi) * np.cos(declinacao_solar) * np.cos(omega)
+    theta_z = np.degrees(np.arccos(np.clip(cos_theta_z, -1, 1)))
+
+    # Calculando o azimute solar
+    gamma_solar = np.degrees(np.arctan2(np.sin(omega),
+                                        np.cos(omega) * np.sin(phi) - np.tan(declinacao_solar) * np.cos(phi)))
+
+    return {
+        "Hora Solar": hora_solar,
+        "Ângulo Zenital": theta_z,
+        "Azimute Solar": gamma_solar
+    }
+
+
+# Função para calcular o ângulo de incidência e a irradiância no plano do painel
+def calcular_incidencia(theta_z, gamma_solar, irradiancia_global, beta, gamma_p):
+    theta_z = np.radians(theta_z)
+    beta = np.radians(beta)
+
+    cos_theta_i = (np.sin(theta_z) * np.cos(np.radians(gamma_p - gamma_solar)) * np.sin(beta) +
+                   np.cos(theta_z) * np.cos(beta))
+    theta_i = np.degrees(np.arccos(np.clip(cos_theta_i, -1, 1)))
+
+    # Irradiância incidente usando a irradiância global e o ângulo de incidência
+    G_inc = irradiancia_global * np.cos(np.radians(theta_i))
+
+    return theta_i, G_inc
+
+
+# Função para calcular, de uma só vez, a geometria solar e a irradiância incidente de uma série de instantes
+def calcular_geometria_solar(data_hora, irradiancia_global, beta, gamma_p, lat, long_local, long_meridiano,
+                             horario_verao=0):
+    posicao = calcular_posicao_solar(data_hora, lat, long_local, long_meridiano, horario_verao)
+    theta_i, G_inc = calcular_incidencia(posicao["Ângulo Zenital"], posicao["Azimute Solar"],
+                                         np.asarray(irradiancia_global, dtype=float), beta, gamma_p)
+
+    posicao["Ângulo de Incidência"] = theta_i
+    posicao["Irradiância Incidente"] = G_inc
+    return posicao
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+
+from data_loader import diretorio_cache
+from maximum_power_point_table import MaximumPowerPointTable
+from single_diode_model import SingleDiodeModel
+
+# Dados do módulo solar HiKu7 Mono PERC 605 W
+short_circuit_current = 18.52  # [A]
+open_circuit_voltage = 41.5  # [V]
+maximum_power_voltage = 34.7  # [V]
+maximum_power_current = 17.44  # [A]
+temperature_current_coefficient = 0.05 / 100 * short_circuit_current  # ([%/ºC] / [100%]) * [A/ºC]
+series_resistance = 0.167  # Estimado (panel series resistance) 0.221
+shunt_resistance = 9.619  # Estimado (panel parallel (shunt) resistance) 415.405
+diode_quality_factor = 0.85  # Estimado 1.3
+
+number_of_series_connected_cells = 60  # Número de células em série
+
+
+# Função para criar o modelo de diodo simples com os dados do HiKu7 (parâmetros podem ser sobrescritos)
+def criar_modelo_hiku7(number_of_voltage_decimal_digits=1, **parametros):
+    argumentos = dict(
+        number_of_voltage_decimal_digits=number_of_voltage_decimal_digits,
+        temperature_current_coefficient=temperature_current_coefficient,
+        series_resistance=series_resistance,
+        shunt_resistance=shunt_resistance,
+        diode_quality_factor=diode_quality_factor,
+    )
+    argumentos.update(parametros)
+    return SingleDiodeModel(short_circuit_current, open_circuit_voltage, number_of_series_connected_cells,
+                            **argumentos)
+
+
+# Função para obter a tabela de máxima potência do HiKu7 (interpolação em vez do solver a cada amostra).
+# A tabela é calculada uma vez e guardada no cache; o nome do arquivo depende dos parâmetros do módulo, da grade
+# e da versão do formato da tabela, então alterar qualquer um deles gera uma nova tabela.
+def obter_tabela_hiku7(arquivo=None, atualizar=False, temperaturas=None, irradiancias=None):
+    modelo = criar_modelo_hiku7()
+    if arquivo is None:
+        chave = MaximumPowerPointTable.cache_key(modelo, temperaturas, irradiancias)
+        arquivo = os.path.join(diretorio_cache, f'tabela_mpp_hiku7_{chave}.npz')
+
+    if not atualizar and os.path.exists(arquivo):
+        return MaximumPowerPointTable.load(arquivo)
+
+    tabela = MaximumPowerPointTable.build(modelo, temperaturas, irradiancias)
+    try:
+        os.makedirs(os.path.dirname(arquivo) or '.', exist_ok=True)
+        tabela.save(arquivo)
+    except OSError as e:
+        print(f"Não foi possível gravar a tabela de máxima potência: {e}")
+    return tabela
+
+
+# Função para estimar Rs, Rsh e o fator de qualidade do diodo do HiKu7 em vez dos valores "Estimado" acima:
+# primeiro a partir dos pontos do datasheet (Isc, Voc, Vmp, Imp) e depois refinando com as medições da string S1
+# (Tensao_S1_Avg, Corrente_S1_Avg e Potencia_S1_Avg) no intervalo [inicio, fim).
+# Sem modulos_serie/strings_paralelo, os números são escolhidos entre candidatos pelo menor erro do ajuste.
+# Retorna (parâmetros, diagnóstico); os parâmetros podem ser usados em criar_modelo_hiku7(**parametros).
+def ajustar_parametros_hiku7(beta, gamma_p, lat, long_local, long_meridiano, inicio=None, fim=None,
+                             modulos_serie=None, strings_paralelo=None):
+    # Importados aqui para que o modelo possa ser criado sem carregar o conjunto de dados nem o scipy.optimize
+    from geometria_solar import calcular_geometria_solar
+    from single_diode_parameter_extraction import extract_parameters_from_datasheet, \
+        refine_parameters_with_measurements
+    from table_data import obter_dados_intervalo
+
+    parametros, diagnostico_datasheet = extract_parameters_from_datasheet(
+        short_circuit_current, open_circuit_voltage, maximum_power_voltage, maximum_power_current,
+        number_of_series_connected_cells, temperature_current_coefficient=temperature_current_coefficient)
+
+    dados = obter_dados_intervalo(inicio, fim, ['Data_Hora', 'Radiação', 'Temp_Cel', 'Tensao_S1_Avg',
+                                                'Corrente_S1_Avg', 'Potencia_S1_Avg'])
+    geometria = calcular_geometria_solar(dados['Data_Hora'], dados['Radiação'], beta, gamma_p, lat, long_local,
+                                         long_meridiano)
+    irradiancia_incidente = np.maximum(np.nan_to_num(geometria['Irradiância Incidente']), 0.0)
+
+    parametros, diagnostico = refine_parameters_with_measurements(
+        criar_modelo_hiku7(**parametros), np.asarray(dados['Temp_Cel'], dtype=float) + 273,  # Convertendo para Kelvin
+        irradiancia_incidente, dados['Tensao_S1_Avg'], dados['Corrente_S1_Avg'], dados['Potencia_S1_Avg'],
+        modulos_serie, strings_paralelo)
+    diagnostico['datasheet'] = diagnostico_datasheet
+    return parametros, diagnostico
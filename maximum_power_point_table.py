@@ -0,0 +1,159 @@
+import hashlib
+
+import numpy
+from scipy.interpolate import RectBivariateSpline
+
+
+class MaximumPowerPointTable(object):
+    # Tabela pré-calculada de Vmp, Imp, Pmp e Voc de um SingleDiodeModel sobre uma grade
+    # temperatura [K] x irradiância [W/m²]. As consultas são interpolações vetorizadas (bilinear ou bicúbica),
+    # sem resolver a equação implícita do diodo para cada amostra.
+    quantities = ('maximum_power_voltages', 'maximum_power_currents', 'maximum_powers', 'open_circuit_voltages')
+    interpolation_methods = ('bilinear', 'bicubic')
+    spline_degree = 3
+    # Incrementar quando o formato do arquivo ou o cálculo da tabela mudar, para invalidar tabelas salvas
+    format_version = 2
+    # A coluna G = 0 guarda o limite de Voc quando G tende a zero (calculado nesta irradiância): a Voc do modelo salta
+    # para 0 em G = 0, e o salto dentro da tabela daria erros de vários volts na primeira coluna da grade
+    zero_irradiance_limit = 1e-9  # [W/m²]
+    # Parâmetros do SingleDiodeModel que alteram os valores da tabela
+    model_parameters = ('short_circuit_current', 'open_circuit_voltage', 'number_of_cells_in_series',
+                        'temperature_voltage_coefficient', 'temperature_current_coefficient', 'series_resistance',
+                        'shunt_resistance', 'diode_quality_factor', 'number_of_voltage_decimal_digits',
+                        'current_tolerance', 'maximum_number_of_iterations', 'temperature_tolerance',
+                        'irradiance_tolerance')
+
+    def __init__(self, temperatures, irradiances, values, maximum_errors=None):
+        self.temperatures = numpy.asarray(temperatures, dtype=float)
+        self.irradiances = numpy.asarray(irradiances, dtype=float)
+        self.values = {quantity: numpy.asarray(values[quantity], dtype=float) for quantity in self.quantities}
+        # Erro máximo (por método e grandeza) em relação ao solver exato, medido no centro das células da grade
+        self.maximum_errors = maximum_errors or {}
+        self.__splines = {}
+
+    @staticmethod
+    def default_grid():
+        temperatures = numpy.arange(-10, 90.5, 1.) + 273  # [K]
+        irradiances = numpy.arange(0, 1405, 5.)  # [W/m²]
+        return temperatures, irradiances
+
+    @classmethod
+    def cache_key(cls, model, temperatures=None, irradiances=None):
+        # Identifica uma tabela salva: versão do formato, interpolação, parâmetros do modelo e grade
+        default_temperatures, default_irradiances = cls.default_grid()
+        temperatures = default_temperatures if temperatures is None else temperatures
+        irradiances = default_irradiances if irradiances is None else irradiances
+
+        digest = hashlib.sha1(repr((cls.format_version, cls.quantities, cls.interpolation_methods, cls.spline_degree,
+                                    tuple(getattr(model, name) for name in cls.model_parameters))).encode('utf-8'))
+        for grid in (temperatures, irradiances):
+            digest.update(numpy.ascontiguousarray(grid, dtype=float).tobytes())
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def build(cls, model, temperatures=None, irradiances=None, estimate_errors=True):
+        default_temperatures, default_irradiances = cls.default_grid()
+        temperatures = default_temperatures if temperatures is None else temperatures
+        irradiances = default_irradiances if irradiances is None else irradiances
+
+        grid_temperatures, grid_irradiances = numpy.meshgrid(temperatures, irradiances, indexing='ij')
+        table = cls(temperatures, irradiances, cls.__exact_values(model, grid_temperatures, grid_irradiances))
+
+        if estimate_errors:
+            for method in cls.interpolation_methods:
+                table.maximum_errors[method] = table.estimate_errors(model, method)
+        return table
+
+    def save(self, file_name):
+        errors = {f'error_{method}_{quantity}': value
+                  for method, quantity_errors in self.maximum_errors.items()
+                  for quantity, value in quantity_errors.items()}
+        numpy.savez(file_name, temperatures=self.temperatures, irradiances=self.irradiances, **self.values,
+                    **errors)
+
+    @classmethod
+    def load(cls, file_name):
+        with numpy.load(file_name, allow_pickle=False) as data:
+            maximum_errors = {}
+            for key in data.files:
+                if key.startswith('error_'):
+                    method, quantity = key[len('error_'):].split('_', 1)
+                    maximum_errors.setdefault(method, {})[quantity] = float(data[key])
+            return cls(data['temperatures'], data['irradiances'], {quantity: data[quantity]
+                                                                   for quantity in cls.quantities}, maximum_errors)
+
+    def interpolate(self, operating_temperature, actual_irradiance, method='bilinear'):
+        # Retorna um dicionário com as grandezas interpoladas; pontos fora da grade usam o valor da borda
+        operating_temperature, actual_irradiance = numpy.broadcast_arrays(
+            numpy.clip(numpy.asarray(operating_temperature, dtype=float), self.temperatures[0], self.temperatures[-1]),
+            numpy.clip(numpy.asarray(actual_irradiance, dtype=float), self.irradiances[0], self.irradiances[-1]))
+
+        if method == 'bilinear':
+            i, weight_temperature = self.__cell(self.temperatures, operating_temperature)
+            j, weight_irradiance = self.__cell(self.irradiances, actual_irradiance)
+            results = {}
+            for quantity, table in self.values.items():
+                lower = table[i, j] + weight_irradiance * (table[i, j + 1] - table[i, j])
+                upper = table[i + 1, j] + weight_irradiance * (table[i + 1, j + 1] - table[i + 1, j])
+                results[quantity] = lower + weight_temperature * (upper - lower)
+        elif method == 'bicubic':
+            results = {quantity: self.__spline(quantity).ev(operating_temperature, actual_irradiance)
+                       for quantity in self.quantities}
+        else:
+            raise ValueError(f"Unknown interpolation method: {method}")
+
+        # Sem irradiância não há tensão de circuito aberto (o salto de Voc em G = 0 fica fora da interpolação)
+        results['open_circuit_voltages'] = numpy.where(actual_irradiance > 0, results['open_circuit_voltages'], 0.0)
+        # Sem geração a potência é nula; a interpolação bicúbica pode oscilar levemente abaixo de zero
+        return {quantity: numpy.maximum(value, 0.0) for quantity, value in results.items()}
+
+    def calculate_maximum_power_point(self, operating_temperature, actual_irradiance, method='bilinear'):
+        # Mesma interface de SingleDiodeModel.calculate_maximum_power_point, para uso direto nas simulações
+        results = self.interpolate(operating_temperature, actual_irradiance, method)
+        maximum_power_point = tuple(results[quantity] for quantity in self.quantities[:3])
+        if numpy.ndim(maximum_power_point[2]) == 0:
+            return tuple(float(value) for value in maximum_power_point)
+        return maximum_power_point
+
+    def estimate_errors(self, model, method='bilinear'):
+        # Compara a interpolação com o solver exato no centro de cada célula da grade (o pior caso da
+        # interpolação bilinear) e retorna o erro absoluto máximo de cada grandeza.
+        temperatures = 0.5 * (self.temperatures[1:] + self.temperatures[:-1])
+        irradiances = 0.5 * (self.irradiances[1:] + self.irradiances[:-1])
+        grid_temperatures, grid_irradiances = numpy.meshgrid(temperatures, irradiances, indexing='ij')
+
+        exact = self.__exact_values(model, grid_temperatures, grid_irradiances)
+        interpolated = self.interpolate(grid_temperatures, grid_irradiances, method)
+        return {quantity: float(numpy.max(numpy.abs(interpolated[quantity] - exact[quantity])))
+                for quantity in self.quantities}
+
+    @classmethod
+    def __exact_values(cls, model, operating_temperatures, actual_irradiances):
+        maximum_power_voltages, maximum_power_currents, maximum_powers = model.calculate_maximum_power_point(
+            operating_temperatures, actual_irradiances)
+        with numpy.errstate(invalid='ignore'):
+            open_circuit_voltages = model.calculate_operating_parameters(
+                operating_temperatures, numpy.maximum(actual_irradiances, cls.zero_irradiance_limit)
+            )['open_circuit_voltage']
+
+        return {
+            'maximum_power_voltages': maximum_power_voltages,
+            'maximum_power_currents': maximum_power_currents,
+            'maximum_powers': maximum_powers,
+            # Pontos em que a tensão de circuito aberto não pôde ser determinada são tratados como sem geração; como
+            # em SingleDiodeModel.calculate, a tensão de circuito aberto é limitada a 0[V]:
+            'open_circuit_voltages': numpy.maximum(numpy.nan_to_num(open_circuit_voltages, nan=0.0), 0.0),
+        }
+
+    @staticmethod
+    def __cell(grid, values):
+        # Índice da célula e peso linear dentro dela (funciona também para grades não uniformes)
+        index = numpy.clip(numpy.searchsorted(grid, values, side='right') - 1, 0, len(grid) - 2)
+        weight = (values - grid[index]) / (grid[index + 1] - grid[index])
+        return index, weight
+
+    def __spline(self, quantity):
+        if quantity not in self.__splines:
+            self.__splines[quantity] = RectBivariateSpline(self.temperatures, self.irradiances, self.values[quantity],
+                                                           kx=self.spline_degree, ky=self.spline_degree)
+        return self.__splines[quantity]
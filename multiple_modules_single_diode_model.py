@@ -0,0 +1,168 @@
+import numpy
+
+
+class MultipleModulesSingleDiodeModel(object):
+    # Arranjo de módulos iguais (mesmo SingleDiodeModel) em strings em série, com as strings em paralelo.
+    # Cada módulo tem a sua própria irradiância e temperatura (sombreamento parcial) e, opcionalmente,
+    # um diodo de bypass que limita a sua tensão reversa a -bypass_diode_voltage.
+    #
+    # As curvas são combinadas por varredura de corrente: numa string em série a corrente é comum, então a tensão
+    # de todos os módulos é resolvida de uma só vez para uma grade de correntes e somada. As strings são combinadas
+    # em paralelo numa grade de tensão comum, interpolando a corrente de cada string.
+
+    def __init__(self,
+                 model,
+                 number_of_modules_in_series,
+                 number_of_strings_in_parallel=1,
+                 bypass_diodes=True,
+                 bypass_diode_voltage=0.5,
+                 number_of_current_points=400,
+                 number_of_voltage_points=1000,
+                 number_of_refinement_points=64):
+
+        self.model = model
+        self.number_of_modules_in_series = number_of_modules_in_series
+        self.number_of_strings_in_parallel = number_of_strings_in_parallel
+        self.bypass_diodes = bypass_diodes
+        self.bypass_diode_voltage = bypass_diode_voltage
+        self.number_of_current_points = number_of_current_points
+        self.number_of_voltage_points = number_of_voltage_points
+        self.number_of_refinement_points = number_of_refinement_points
+
+    def calculate_module_parameters(self, operating_temperatures, actual_irradiances):
+        # Temperaturas [K] e irradiâncias [W/m²] escalares ou com forma (strings, módulos) (com broadcasting)
+        shape = (self.number_of_strings_in_parallel, self.number_of_modules_in_series)
+        operating_temperatures = numpy.broadcast_to(numpy.asarray(operating_temperatures, dtype=float), shape)
+        actual_irradiances = numpy.broadcast_to(numpy.asarray(actual_irradiances, dtype=float), shape)
+
+        parameters = self.model.calculate_operating_parameters(operating_temperatures, actual_irradiances,
+                                                               include_open_circuit_voltage=False)
+        # Sem irradiância o módulo não gera (e só conduz através do bypass ou da resistência em paralelo)
+        photo_current = numpy.maximum(numpy.nan_to_num(parameters['photo_current']), 0.0)
+        return {
+            'photo_current': photo_current,
+            'saturation_current': numpy.broadcast_to(parameters['saturation_current'], shape),
+            'modified_thermal_voltage': numpy.broadcast_to(
+                self.model.number_of_cells_in_series * parameters['thermal_voltage'], shape),
+        }
+
+    def calculate_module_voltages(self, currents, photo_current, saturation_current, modified_thermal_voltage):
+        # Tensão de cada módulo para cada corrente: resolve a tensão no diodo Vd em
+        #   f(Vd) = Iph - Io (exp(Vd/a) - 1) - Vd/Rsh - I = 0,
+        # que é côncava e decrescente; partindo de Vd0 = a log(1 + max(Iph - I, 0)/Io), onde f(Vd0) <= 0,
+        # as iterações de Newton convergem monotonicamente. Depois V = Vd - I Rs.
+        # As entradas são combinadas por broadcasting (por exemplo módulos [..., 1] com correntes [K]).
+        rsh = self.model.shunt_resistance
+        iph, io, a = photo_current, saturation_current, modified_thermal_voltage
+
+        diode_voltages = a * numpy.log1p(numpy.maximum(iph - currents, 0.0) / io)
+        for _ in range(self.model.maximum_number_of_iterations):
+            exponential = io * numpy.exp(diode_voltages / a)
+            residuals = iph - (exponential - io) - diode_voltages / rsh - currents
+            steps = residuals / (-exponential / a - 1 / rsh)
+            diode_voltages = diode_voltages - steps
+            if numpy.all(numpy.abs(steps) <= self.model.current_tolerance * numpy.abs(a)):
+                break
+
+        voltages = diode_voltages - currents * self.model.series_resistance
+        if self.bypass_diodes:
+            # O diodo de bypass conduz quando o módulo seria polarizado reversamente
+            voltages = numpy.maximum(voltages, -self.bypass_diode_voltage)
+        return voltages
+
+    def calculate_string_curves(self, operating_temperatures, actual_irradiances):
+        # Curvas V(I) de todas as strings sobre uma grade de corrente comum.
+        # A grade inclui a corrente fotogerada de cada módulo, onde ficam os "joelhos" das curvas com sombreamento.
+        parameters = self.calculate_module_parameters(operating_temperatures, actual_irradiances)
+        photo_current = parameters['photo_current']
+
+        maximum_current = numpy.max(photo_current)
+        currents = numpy.unique(numpy.concatenate([
+            numpy.linspace(0., maximum_current, self.number_of_current_points),
+            photo_current.ravel()]))
+
+        return currents, self.__string_voltages(currents, parameters), parameters
+
+    def calculate(self, operating_temperatures, actual_irradiances):
+        currents, string_voltages, parameters = self.calculate_string_curves(operating_temperatures,
+                                                                             actual_irradiances)
+
+        if self.number_of_strings_in_parallel == 1:
+            # Uma única string: a curva do arranjo é a própria varredura de corrente (ordenada por tensão)
+            voltages = string_voltages[0, ::-1]
+            array_currents = currents[::-1]
+        else:
+            voltages = numpy.linspace(0., max(numpy.max(string_voltages), 0.), self.number_of_voltage_points)
+            array_currents = numpy.sum(self.__string_currents(voltages, currents, string_voltages), axis=0)
+
+        keep = voltages >= 0
+        voltages, array_currents = voltages[keep], array_currents[keep]
+        powers = voltages * array_currents
+
+        maximum_power_point = self.__refine_maximum_power_point(voltages, powers, currents, string_voltages,
+                                                                parameters)
+
+        return {
+            'voltages': voltages,
+            'currents': array_currents,
+            'powers': powers,
+            'string_currents': currents,
+            'string_voltages': string_voltages,
+            'maximum_power_voltage': maximum_power_point[0],
+            'maximum_power_current': maximum_power_point[1],
+            'maximum_power': maximum_power_point[2],
+        }
+
+    def calculate_maximum_power_point(self, operating_temperatures, actual_irradiances):
+        # Ponto de máxima potência global (Vmp, Imp, Pmp), mesmo com vários picos na curva P-V
+        result = self.calculate(operating_temperatures, actual_irradiances)
+        return result['maximum_power_voltage'], result['maximum_power_current'], result['maximum_power']
+
+    def __string_voltages(self, currents, parameters):
+        # Tensões (strings, módulos, correntes) somadas ao longo dos módulos de cada string
+        module_voltages = self.calculate_module_voltages(currents,
+                                                         parameters['photo_current'][..., numpy.newaxis],
+                                                         parameters['saturation_current'][..., numpy.newaxis],
+                                                         parameters['modified_thermal_voltage'][..., numpy.newaxis])
+        return numpy.sum(module_voltages, axis=1)
+
+    def __string_currents(self, voltages, currents, string_voltages):
+        # Corrente de cada string para as tensões dadas. V(I) de uma string é não crescente, então I(V) é obtida por
+        # interpolação; as strings são deslocadas para faixas disjuntas e interpoladas numa única chamada.
+        # Acima da tensão de circuito aberto a string não fornece corrente (diodo de bloqueio).
+        number_of_strings = len(string_voltages)
+        ascending_voltages = string_voltages[:, ::-1]
+        ascending_currents = numpy.broadcast_to(currents[::-1], ascending_voltages.shape)
+
+        span = numpy.max(ascending_voltages) - numpy.min(ascending_voltages) + 1.
+        offsets = span * numpy.arange(number_of_strings)[:, numpy.newaxis]
+        queries = numpy.clip(voltages, ascending_voltages[:, :1], ascending_voltages[:, -1:]) + offsets
+
+        string_currents = numpy.interp(queries.ravel(), (ascending_voltages + offsets).ravel(),
+                                       ascending_currents.ravel()).reshape(number_of_strings, -1)
+        return numpy.where(voltages > ascending_voltages[:, -1:], 0.0, string_currents)
+
+    def __refine_maximum_power_point(self, voltages, powers, currents, string_voltages, parameters):
+        # O máximo da curva discretizada indica o pico global; em volta dele a curva é reamostrada numa grade fina
+        index = int(numpy.argmax(powers))
+        if powers[index] <= 0:
+            return 0., 0., 0.
+
+        lower, upper = max(index - 1, 0), min(index + 1, len(voltages) - 1)
+
+        if self.number_of_strings_in_parallel == 1:
+            # Varredura fina de corrente entre as correntes vizinhas do máximo (tensões exatas dos módulos)
+            neighbour_currents = numpy.interp([voltages[lower], voltages[upper]], string_voltages[0, ::-1],
+                                              currents[::-1])
+            fine_currents = numpy.linspace(neighbour_currents.min(), neighbour_currents.max(),
+                                           self.number_of_refinement_points)
+            fine_voltages = self.__string_voltages(fine_currents, parameters)[0]
+            fine_powers = fine_voltages * fine_currents
+            best = int(numpy.argmax(fine_powers))
+            return float(fine_voltages[best]), float(fine_currents[best]), float(fine_powers[best])
+
+        fine_voltages = numpy.linspace(voltages[lower], voltages[upper], self.number_of_refinement_points)
+        fine_currents = numpy.sum(self.__string_currents(fine_voltages, currents, string_voltages), axis=0)
+        fine_powers = fine_voltages * fine_currents
+        best = int(numpy.argmax(fine_powers))
+        return float(fine_voltages[best]), float(fine_currents[best]), float(fine_powers[best])
@@ -1,55 +1,80 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
 import numpy as np
-from table_data import obter_dados_data_hora, calcular_angulos_irradiancia
-import matplotlib.pyplot as plt
+import pandas as pd
+from scipy import optimize
+from data_loader import abrir_memmap, diretorio_memmap, fatiar_intervalo, obter_memmap
+from table_data import obter_dados_dia, datas_disponiveis
+from geometria_solar import calcular_posicao_solar
+from execucao import TarefaCancelada
+
+# Função para pré-calcular as componentes da irradiância do dia, que dependem apenas do tempo e da localização.
+# Como cos(theta_i) = sen(theta_z) cos(gamma_p - gamma_s) sen(beta) + cos(theta_z) cos(beta), a soma de G_inc no dia é
+#   sen(beta) [cos(gamma_p) A + sen(gamma_p) B] + cos(beta) C
+# com A = soma(G sen(theta_z) cos(gamma_s)), B = soma(G sen(theta_z) sen(gamma_s)) e C = soma(G cos(theta_z)).
+# Opcionalmente, os dados podem vir de matrizes ordenadas por 'Data_Hora' (por exemplo, mapeadas em memória).
+# Como na soma minuto a minuto original, só o primeiro registro de cada minuto é considerado (registros com
+# instante repetido não são somados de novo).
+def calcular_componentes_dia(data_selecionada, lat, long_local, long_meridiano, dados=None):
+    if dados is None:
+        dados_dia = obter_dados_dia(data_selecionada, ['Data_Hora', 'Radiação'])
+    else:
+        inicio = pd.to_datetime(data_selecionada, format='%d/%m/%y')
+        dados_dia = fatiar_intervalo(dados, inicio, inicio + pd.Timedelta(days=1))
+
+    # Os dados do dia são ordenados (ordenação estável), então registros do mesmo minuto são vizinhos
+    minutos = np.asarray(dados_dia['Data_Hora'], dtype='datetime64[m]')
+    primeiros = np.ones(len(minutos), dtype=bool)
+    primeiros[1:] = minutos[1:] != minutos[:-1]
+
+    posicao = calcular_posicao_solar(np.asarray(dados_dia['Data_Hora'])[primeiros], lat, long_local, long_meridiano)
+
+    theta_z = np.radians(posicao['Ângulo Zenital'])
+    gamma_solar = np.radians(posicao['Azimute Solar'])
+    irradiancia = np.asarray(dados_dia['Radiação'])[primeiros]
+
+    direcoes = np.stack([np.sin(theta_z) * np.cos(gamma_solar),
+                         np.sin(theta_z) * np.sin(gamma_solar),
+                         np.cos(theta_z)])
+    return direcoes @ irradiancia
+
+
+# Função para avaliar a irradiância total de uma ou várias orientações (aceita matrizes de beta e gamma_p)
+def avaliar_orientacao(componentes, beta, gamma_p):
+    beta = np.radians(beta)
+    gamma_p = np.radians(gamma_p)
+    A, B, C = componentes
+    return np.sin(beta) * (np.cos(gamma_p) * A + np.sin(gamma_p) * B) + np.cos(beta) * C
+
+
+# Função para calcular a grade inclinação x orientação inteira numa única operação com broadcasting
+def calcular_grade_irradiancia(componentes, inclinacoes, orientacoes):
+    return avaliar_orientacao(componentes, inclinacoes[:, np.newaxis], orientacoes[np.newaxis, :])
+
 
 # Função para calcular a irradiância total ao longo do dia para uma inclinação e orientação específicas
 def calcular_irradiancia_total_dia(data_selecionada, beta, gamma_p, lat, long_local, long_meridiano):
-    irradiancia_total = 0
-    # Passando por todas as horas do dia
-    for hora in range(24):
-        for minuto in range(0, 60, 1):  # Verificar a cada minuto
-            hora_selecionada = f"{hora:02d}:{minuto:02d}"
-            # print("hora_selecionada", hora_selecionada)
-            dados_hora = obter_dados_data_hora(data_selecionada, hora_selecionada)
-            if dados_hora is not None:
-                actual_irradiance = dados_hora['Radiação']
-                operating_temperature = dados_hora['Temp_Cel'] + 273  # Convertendo para Kelvin
-
-                angulos_irradiancia = calcular_angulos_irradiancia(
-                    data_hora_str=f"{data_selecionada} {hora_selecionada}",
-                    irradiancia_global=actual_irradiance,
-                    beta= beta,  # Inclinação do painel
-                    gamma_p= gamma_p,  # Orientação do painel em relação ao norte
-                    lat= lat,  # Latitude
-                    long_local= long_local,  # Longitude
-                    long_meridiano=long_meridiano  # Meridiano central do fuso horário
-                )
-                irradiancia_total += angulos_irradiancia['Irradiância Incidente']
-    return irradiancia_total
+    componentes = calcular_componentes_dia(data_selecionada, lat, long_local, long_meridiano)
+    return avaliar_orientacao(componentes, beta, gamma_p)
+
 
 # Função para otimizar a inclinação e orientação
 def otimizar_inclinacao_orientacao(data_selecionada, lat, long_local, long_meridiano):
-    melhor_inclinacao = 0
-    melhor_orientacao = 0
-    irradiancia_maxima = -np.inf
-
     # Ajustar as varreduras de ângulo e inclinação
-    inclinacoes = np.arange(0, 91, 1)  # Varredura de inclinação de 0 a 90 graus (em intervalos de 15 graus)
-    orientacoes = np.arange(-90, 91, 1)  # Varredura de orientação de -90 a 90 graus (em intervalos de 15 graus)
-
-    resultados = np.zeros((len(inclinacoes), len(orientacoes)))
+    inclinacoes = np.arange(0, 91, 1)  # Varredura de inclinação de 0 a 90 graus (em intervalos de 1 grau)
+    orientacoes = np.arange(-90, 91, 1)  # Varredura de orientação de -90 a 90 graus (em intervalos de 1 grau)
 
-    for i, beta in enumerate(inclinacoes):
-        for j, gamma_p in enumerate(orientacoes):
-            irradiancia_total = calcular_irradiancia_total_dia(data_selecionada, beta, gamma_p, lat, long_local, long_meridiano)
-            # print("atual beta", beta)
-            # print("atual gama", gamma_p)
-            resultados[i, j] = irradiancia_total
+    # A posição do sol é calculada uma única vez para o dia; cada orientação custa apenas algumas operações
+    componentes = calcular_componentes_dia(data_selecionada, lat, long_local, long_meridiano)
+    resultados = calcular_grade_irradiancia(componentes, inclinacoes, orientacoes)
 
-            if irradiancia_total > irradiancia_maxima:
-                irradiancia_maxima = irradiancia_total
-                melhor_inclinacao = beta
-                melhor_orientacao = gamma_p
+    i, j = np.unravel_index(np.argmax(resultados), resultados.shape)
+    melhor_inclinacao = inclinacoes[i]
+    melhor_orientacao = orientacoes[j]
+    irradiancia_maxima = resultados[i, j]
 
     print("--------------------------")
     print(f"Melhor inclinação: {melhor_inclinacao} graus")
@@ -59,13 +84,231 @@ def otimizar_inclinacao_orientacao(data_selecionada, lat, long_local, long_merid
     return inclinacoes, orientacoes, resultados
 
 
+# Função para interromper um cálculo longo quando a interface pedir o cancelamento
+def _verificar_cancelamento(cancelamento):
+    if cancelamento is not None and cancelamento.is_set():
+        raise TarefaCancelada()
+
+
+# Matrizes mapeadas em memória abertas neste processo, por diretório
+_dados_memmap = {}
+
+
+# Função executada em cada processo: soma as grades diárias de um bloco de dias.
+# Como a grade é linear nas componentes do dia, somar as componentes e avaliar a grade uma vez é equivalente.
+# Com um diretório de armazenamento mapeado em memória, os processos compartilham as mesmas páginas dos dados
+# em vez de cada um carregar o DataFrame inteiro.
+def _calcular_grade_bloco(datas, lat, long_local, long_meridiano, inclinacoes, orientacoes, diretorio=None):
+    dados = None
+    if diretorio is not None:
+        if diretorio not in _dados_memmap:
+            _dados_memmap[diretorio] = abrir_memmap(diretorio, ['Data_Hora', 'Radiação'])
+        dados = _dados_memmap[diretorio]
+
+    componentes = np.zeros(3)
+    for data_selecionada in datas:
+        componentes += calcular_componentes_dia(data_selecionada, lat, long_local, long_meridiano, dados)
+    return calcular_grade_irradiancia(componentes, inclinacoes, orientacoes)
+
+
+# Função para otimizar a inclinação e orientação ao longo de vários dias (mês, estação ou todo o conjunto de dados).
+# Os dias são divididos entre processos e as grades de cada bloco são somadas numa grade de energia agregada.
+# progresso(fracao) é chamada a cada bloco concluído; se o evento cancelamento for ativado, os blocos pendentes
+# são descartados e TarefaCancelada é levantada.
+def otimizar_inclinacao_orientacao_periodo(datas, lat, long_local, long_meridiano, max_workers=None,
+                                           usar_memmap=True, progresso=None, cancelamento=None):
+    if datas is None:
+        datas = datas_disponiveis()
+    if len(datas) == 0:
+        raise ValueError("Nenhum dia selecionado para a otimização.")
+
+    inclinacoes = np.arange(0, 91, 1)
+    orientacoes = np.arange(-90, 91, 1)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    numero_blocos = min(len(datas), max_workers * 4)
+    blocos = [list(bloco) for bloco in np.array_split(np.array(datas, dtype=object), numero_blocos)]
+
+    diretorio = None
+    if usar_memmap and max_workers > 1:
+        obter_memmap()
+        diretorio = diretorio_memmap()
+
+    resultados = np.zeros((len(inclinacoes), len(orientacoes)))
+    if max_workers == 1:
+        for concluidos, bloco in enumerate(blocos, 1):
+            _verificar_cancelamento(cancelamento)
+            resultados += _calcular_grade_bloco(bloco, lat, long_local, long_meridiano, inclinacoes, orientacoes)
+            if progresso is not None:
+                progresso(concluidos / len(blocos))
+    else:
+        # spawn: esta função também roda numa thread do processo da interface, que não deve ser copiado por fork
+        executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context('spawn'))
+        cancelada = False
+        try:
+            pendentes = {executor.submit(_calcular_grade_bloco, bloco, lat, long_local, long_meridiano,
+                                         inclinacoes, orientacoes, diretorio) for bloco in blocos}
+            concluidos = 0
+            while pendentes:
+                # A espera é interrompida periodicamente para verificar o cancelamento mesmo com blocos longos
+                prontos, pendentes = wait(pendentes, timeout=0.1, return_when=FIRST_COMPLETED)
+                if cancelamento is not None and cancelamento.is_set():
+                    cancelada = True
+                    raise TarefaCancelada()
+                for futuro in prontos:
+                    resultados += futuro.result()
+                    concluidos += 1
+                    if progresso is not None:
+                        progresso(concluidos / len(blocos))
+        finally:
+            # No cancelamento os blocos pendentes são descartados e os que estão em execução não são esperados
+            executor.shutdown(wait=not cancelada, cancel_futures=True)
+
+    i, j = np.unravel_index(np.argmax(resultados), resultados.shape)
+
+    print("--------------------------")
+    print(f"Período: {len(datas)} dias ({datas[0]} a {datas[-1]})")
+    print(f"Melhor inclinação: {inclinacoes[i]} graus")
+    print(f"Melhor orientação: {orientacoes[j]} graus (em relação ao norte)")
+    print(f"Irradiância total máxima: {resultados[i, j]:.2f} W/m² no período")
+
+    return inclinacoes, orientacoes, resultados
+
+
+# Limites da busca de inclinação e orientação (graus)
+limites_inclinacao = (0, 90)
+limites_orientacao = (-90, 90)
+
+
+# Função para refinar a busca em grades cada vez menores em torno da melhor célula
+def _buscar_refinamento(objetivo, tolerancia, passo_inicial=10, pontos_por_eixo=5):
+    (beta_min, beta_max), (gamma_min, gamma_max) = limites_inclinacao, limites_orientacao
+    inclinacoes = np.arange(beta_min, beta_max + passo_inicial / 2, passo_inicial)
+    orientacoes = np.arange(gamma_min, gamma_max + passo_inicial / 2, passo_inicial)
+    passo = passo_inicial
+
+    while True:
+        resultados = objetivo(inclinacoes[:, np.newaxis], orientacoes[np.newaxis, :])
+        i, j = np.unravel_index(np.argmax(resultados), resultados.shape)
+        melhor_inclinacao, melhor_orientacao = inclinacoes[i], orientacoes[j]
+        if passo <= tolerancia:
+            return melhor_inclinacao, melhor_orientacao, resultados[i, j]
+
+        # Nova grade cobrindo as células vizinhas da melhor, com passo menor
+        novo_passo = max(2 * passo / (pontos_por_eixo - 1), tolerancia)
+        inclinacoes = np.clip(melhor_inclinacao + np.arange(-passo, passo + novo_passo / 2, novo_passo),
+                              beta_min, beta_max)
+        orientacoes = np.clip(melhor_orientacao + np.arange(-passo, passo + novo_passo / 2, novo_passo),
+                              gamma_min, gamma_max)
+        passo = novo_passo
+
+
+# Função para buscar o máximo com minimização limitada (L-BFGS-B, gradiente analítico) a partir de uma grade grossa
+def _buscar_gradiente(objetivo, gradiente, tolerancia, passo_inicial=15):
+    # Com beta = 0 a orientação não altera a irradiância (gradiente nulo em gamma_p);
+    # por isso a grade grossa de partida usa apenas inclinações interiores
+    inclinacoes = np.arange(limites_inclinacao[0] + passo_inicial / 2, limites_inclinacao[1], passo_inicial)
+    orientacoes = np.arange(limites_orientacao[0], limites_orientacao[1] + 1, passo_inicial)
+    resultados = objetivo(inclinacoes[:, np.newaxis], orientacoes[np.newaxis, :])
+    i, j = np.unravel_index(np.argmax(resultados), resultados.shape)
+    x0 = [inclinacoes[i], orientacoes[j]]
+
+    solucao = optimize.minimize(lambda x: -objetivo(x[0], x[1]), x0=x0, jac=lambda x: -gradiente(x[0], x[1]),
+                                method='L-BFGS-B', bounds=[limites_inclinacao, limites_orientacao],
+                                options={'ftol': 1e-15, 'gtol': tolerancia * 1e-3})
+    return solucao.x[0], solucao.x[1], -solucao.fun
+
+
+# Função para buscar a melhor inclinação e orientação com o modo escolhido:
+#   'grade'       - varredura exaustiva de 1 grau (mesmo resultado de otimizar_inclinacao_orientacao)
+#   'refinamento' - grade grossa refinada em torno da melhor célula até a tolerância (graus)
+#   'gradiente'   - minimização limitada do scipy partindo da melhor célula de uma grade grossa
+def buscar_orientacao_otima(data_selecionada, lat, long_local, long_meridiano, modo='refinamento', tolerancia=0.01):
+    # Sem tolerância positiva o refinamento nunca para (o passo não fica abaixo da tolerância)
+    if not tolerancia > 0:
+        raise ValueError(f"A tolerância deve ser positiva: {tolerancia}")
+    inicio = time.perf_counter()
+    componentes = calcular_componentes_dia(data_selecionada, lat, long_local, long_meridiano)
+
+    avaliacoes = [0]
+
+    def objetivo(beta, gamma_p):
+        valores = avaliar_orientacao(componentes, beta, gamma_p)
+        avaliacoes[0] += np.size(valores)
+        return valores
+
+    def gradiente(beta, gamma_p):
+        beta, gamma_p = np.radians(beta), np.radians(gamma_p)
+        A, B, C = componentes
+        return np.radians([np.cos(beta) * (np.cos(gamma_p) * A + np.sin(gamma_p) * B) - np.sin(beta) * C,
+                           np.sin(beta) * (np.cos(gamma_p) * B - np.sin(gamma_p) * A)])
+
+    if modo == 'grade':
+        inclinacoes = np.arange(limites_inclinacao[0], limites_inclinacao[1] + 1)
+        orientacoes = np.arange(limites_orientacao[0], limites_orientacao[1] + 1)
+        resultados = objetivo(inclinacoes[:, np.newaxis], orientacoes[np.newaxis, :])
+        i, j = np.unravel_index(np.argmax(resultados), resultados.shape)
+        melhor_inclinacao, melhor_orientacao, irradiancia_maxima = inclinacoes[i], orientacoes[j], resultados[i, j]
+    elif modo == 'refinamento':
+        melhor_inclinacao, melhor_orientacao, irradiancia_maxima = _buscar_refinamento(objetivo, tolerancia)
+    elif modo == 'gradiente':
+        melhor_inclinacao, melhor_orientacao, irradiancia_maxima = _buscar_gradiente(objetivo, gradiente, tolerancia)
+    else:
+        raise ValueError(f"Modo de otimização desconhecido: {modo}")
+
+    return {
+        "Inclinação": float(melhor_inclinacao),
+        "Orientação": float(melhor_orientacao),
+        "Irradiância Total": float(irradiancia_maxima),
+        "Avaliações": avaliacoes[0],
+        "Tempo": time.perf_counter() - inicio
+    }
+
+
+# Função para comparar os modos de busca com a varredura exaustiva (avaliações e tempo)
+def comparar_modos_otimizacao(data_selecionada, lat, long_local, long_meridiano, modos=('refinamento', 'gradiente'),
+                              tolerancia=0.01):
+    referencia = buscar_orientacao_otima(data_selecionada, lat, long_local, long_meridiano, 'grade')
+    resultados = {'grade': referencia}
+
+    print("--------------------------")
+    for modo in ('grade',) + tuple(modos):
+        if modo != 'grade':
+            resultados[modo] = buscar_orientacao_otima(data_selecionada, lat, long_local, long_meridiano, modo,
+                                                       tolerancia)
+        resultado = resultados[modo]
+        print(f"{modo:>12}: inclinação {resultado['Inclinação']:.3f} graus, "
+              f"orientação {resultado['Orientação']:.3f} graus, "
+              f"irradiância {resultado['Irradiância Total']:.2f} W/m², "
+              f"{resultado['Avaliações']} avaliações "
+              f"({resultado['Avaliações'] / referencia['Avaliações']:.1%} da grade), "
+              f"{resultado['Tempo'] * 1e3:.2f} ms")
+
+    return resultados
+
+
+# Função para montar a figura do mapa de irradiância (sem exibi-la), para ser desenhada num Canvas ou numa janela
+def criar_figura_irradiancia(inclinacoes, orientacoes, resultados, fig=None):
+    # O matplotlib é importado só aqui e em plotar_resultados_irradiancia: os processos de
+    # otimizar_inclinacao_orientacao_periodo reimportam este módulo e não precisam dele
+    from matplotlib.figure import Figure
+
+    # Sem fig, a figura não é registrada no pyplot (pode ser descartada pela interface sem plt.close)
+    if fig is None:
+        fig = Figure(figsize=(10, 8))
+    ax = fig.subplots()
+    X, Y = np.meshgrid(orientacoes, inclinacoes)
+    contorno = ax.contourf(X, Y, resultados, cmap="viridis", levels=20)
+    fig.colorbar(contorno, ax=ax, label="Irradiância Total [W/m²]")
+    ax.set_xlabel("Orientação [graus]")
+    ax.set_ylabel("Inclinação [graus]")
+    ax.set_title("Otimização da Inclinação e Orientação do Painel")
+    return fig
+
+
 # Função para plotar o gráfico de otimização
 def plotar_resultados_irradiancia(inclinacoes, orientacoes, resultados):
-    plt.figure(figsize=(10, 8))
-    X, Y = np.meshgrid(orientacoes, inclinacoes)
-    plt.contourf(X, Y, resultados, cmap="viridis", levels=20)
-    plt.colorbar(label="Irradiância Total [W/m²]")
-    plt.xlabel("Orientação [graus]")
-    plt.ylabel("Inclinação [graus]")
-    plt.title("Otimização da Inclinação e Orientação do Painel")
+    import matplotlib.pyplot as plt
+
+    criar_figura_irradiancia(inclinacoes, orientacoes, resultados, plt.figure(figsize=(10, 8)))
     plt.show()
\ No newline at end of file
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from geometria_solar import calcular_geometria_solar
+from hiku7 import criar_modelo_hiku7
+from data_loader import ler_csv_em_blocos
+
+
+# Função para simular a potência DC do módulo para cada instante do conjunto de dados (sem interface gráfica).
+# Etapas: geometria solar vetorizada -> irradiância no plano do painel -> Pmp do diodo simples em lote.
+# modelo pode ser um SingleDiodeModel ou uma MaximumPowerPointTable (por exemplo hiku7.obter_tabela_hiku7()).
+def simular_producao(beta, gamma_p, lat, long_local, long_meridiano, modelo=None, inicio=None, fim=None,
+                     numero_modulos=1):
+    # Importado aqui para que a simulação em blocos não carregue o conjunto de dados inteiro
+    from table_data import obter_dados_intervalo
+
+    if modelo is None:
+        modelo = criar_modelo_hiku7()
+
+    dados = obter_dados_intervalo(inicio, fim, ['Data_Hora', 'Radiação', 'Temp_Cel'])
+    return simular_bloco(dados, beta, gamma_p, lat, long_local, long_meridiano, modelo, numero_modulos)
+
+
+# Função para simular um bloco de medições (dicionário ou DataFrame com 'Data_Hora', 'Radiação' e 'Temp_Cel')
+def simular_bloco(dados, beta, gamma_p, lat, long_local, long_meridiano, modelo, numero_modulos=1):
+    data_hora = np.asarray(dados['Data_Hora'])
+    geometria = calcular_geometria_solar(data_hora, dados['Radiação'], beta, gamma_p, lat, long_local,
+                                         long_meridiano)
+
+    # Com o sol atrás do painel a irradiância incidente é nula, não negativa
+    irradiancia_incidente = np.maximum(np.nan_to_num(geometria['Irradiância Incidente']), 0.0)
+    temperatura = np.asarray(dados['Temp_Cel'], dtype=float)
+
+    tensao, corrente, potencia = modelo.calculate_maximum_power_point(temperatura + 273,  # Convertendo para Kelvin
+                                                                      irradiancia_incidente)
+
+    return pd.DataFrame({
+        'Irradiância Incidente': irradiancia_incidente,
+        'Temp_Cel': temperatura,
+        'Vmp': tensao,
+        'Imp': corrente,
+        'Potencia_DC': numero_modulos * np.nan_to_num(potencia),
+    }, index=pd.DatetimeIndex(data_hora, name='Data_Hora'))
+
+
+# Função para obter o intervalo típico entre medições (em horas)
+def passo_medicoes(indice):
+    if len(indice) < 2:
+        return 1 / 60
+    passo = np.median(np.diff(indice.to_numpy()).astype('timedelta64[s]').astype(float)) / 3600
+    return passo if passo > 0 else 1 / 60
+
+
+# Função para integrar a potência DC [W] em energia [Wh] por período ('D' diário, 'MS' mensal, ...).
+# Cada medição representa um passo típico; lacunas nos dados não geram energia.
+def integrar_energia(producao, frequencia='D'):
+    energia = producao['Potencia_DC'] * passo_medicoes(producao.index)
+    return energia.resample(frequencia).sum().rename('Energia_Wh')
+
+
+# Função para executar a simulação completa e devolver a série de potência e as energias diária e mensal
+def simular_energia(beta, gamma_p, lat, long_local, long_meridiano, modelo=None, inicio=None, fim=None,
+                    numero_modulos=1):
+    producao = simular_producao(beta, gamma_p, lat, long_local, long_meridiano, modelo, inicio, fim, numero_modulos)
+    return producao, integrar_energia(producao, 'D'), integrar_energia(producao, 'MS')
+
+
+# Função geradora que lê a planilha em blocos e simula cada bloco, sem carregar o arquivo inteiro na memória
+def simular_producao_em_blocos(beta, gamma_p, lat, long_local, long_meridiano, modelo=None, fonte=None,
+                               tamanho_bloco=100000, float32=True, numero_modulos=1):
+    if modelo is None:
+        modelo = criar_modelo_hiku7()
+
+    for bloco in ler_csv_em_blocos(fonte, tamanho_bloco, float32, ['Data_Hora', 'Radiação', 'Temp_Cel']):
+        bloco = bloco.dropna(subset=['Data_Hora'])
+        yield simular_bloco(bloco, beta, gamma_p, lat, long_local, long_meridiano, modelo, numero_modulos)
+
+
+# Função para integrar a energia por período a partir dos blocos simulados, acumulando apenas os totais
+def integrar_energia_em_blocos(producoes, frequencia='D'):
+    totais = None
+    for producao in producoes:
+        energia = integrar_energia(producao, frequencia)
+        totais = energia if totais is None else totais.add(energia, fill_value=0)
+    return totais
@@ -1,8 +1,139 @@
-from math import exp
+import threading
+from collections import OrderedDict
+
 import numpy
 from single_voltage_irradiance_dependence import SingleVoltageIrradianceDependence
 
 
+class _LeastRecentlyUsedCache(object):
+    # Cache limitado (descarta o item usado há mais tempo) e seguro entre threads, com contagem de acertos e falhas
+
+    def __init__(self, maximum_size):
+        self.maximum_size = maximum_size
+        self.hits = 0
+        self.misses = 0
+        self.__items = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get_or_calculate(self, key, calculate):
+        with self.__lock:
+            if key in self.__items:
+                self.hits += 1
+                self.__items.move_to_end(key)
+                return self.__items[key]
+            self.misses += 1
+
+        # O cálculo é feito fora da trava para não serializar as threads
+        value = calculate()
+
+        if self.maximum_size > 0:
+            with self.__lock:
+                self.__items[key] = value
+                self.__items.move_to_end(key)
+                while len(self.__items) > self.maximum_size:
+                    self.__items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.__lock:
+            self.__items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def statistics(self):
+        with self.__lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self.__items),
+                    'maximum_size': self.maximum_size}
+
+
+# Índices 0, 1, 2, ... compartilhados (somente leitura) para preencher grades de tensão sem matrizes temporárias
+_indices = numpy.arange(0.)
+
+
+def _fill_linear_grid(stop, out):
+    # Mesmos valores de numpy.linspace(0, stop, len(out)), escritos em out
+    global _indices
+    indices = _indices
+    if len(indices) < len(out):
+        indices = numpy.arange(float(max(len(out), 2 * len(indices))))
+        indices.flags.writeable = False
+        _indices = indices
+
+    if len(out) == 1:
+        out[0] = 0.
+        return out
+    numpy.multiply(indices[:len(out)], stop / (len(out) - 1), out=out)
+    out[-1] = stop
+    return out
+
+
+class SingleDiodeModelResult(object):
+    # Curva I-V/P-V de um ponto de operação. Imutável: as matrizes são somente leitura e não há atributos novos,
+    # então o mesmo resultado pode ser compartilhado entre threads (e pelo cache do modelo) sem cópias.
+    __slots__ = ('_operating_temperature', '_actual_irradiance', '_voltages', '_currents', '_powers')
+
+    def __init__(self, operating_temperature, actual_irradiance, voltages, currents, powers):
+        for name, value in (('_operating_temperature', float(operating_temperature)),
+                            ('_actual_irradiance', float(actual_irradiance)),
+                            ('_voltages', self.__read_only(voltages)),
+                            ('_currents', self.__read_only(currents)),
+                            ('_powers', self.__read_only(powers))):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __len__(self):
+        return len(self._voltages)
+
+    def __repr__(self):
+        return (f"{type(self).__name__}(operating_temperature={self._operating_temperature}, "
+                f"actual_irradiance={self._actual_irradiance}, number_of_points={len(self)})")
+
+    @property
+    def operating_temperature(self):
+        return self._operating_temperature
+
+    @property
+    def actual_irradiance(self):
+        return self._actual_irradiance
+
+    @property
+    def voltages(self):
+        return self._voltages
+
+    @property
+    def currents(self):
+        return self._currents
+
+    @property
+    def powers(self):
+        return self._powers
+
+    @property
+    def short_circuit_current(self):
+        return float(self._currents[0])
+
+    @property
+    def open_circuit_voltage(self):
+        return float(self._voltages[-1])
+
+    @property
+    def maximum_power_point(self):
+        # Máximo da curva discretizada (calculate_maximum_power_point do modelo resolve o ponto exato)
+        index = int(numpy.argmax(self._powers))
+        return float(self._voltages[index]), float(self._currents[index]), float(self._powers[index])
+
+    @staticmethod
+    def __read_only(values):
+        view = numpy.asarray(values, dtype=float).view()
+        view.flags.writeable = False
+        return view
+
+
 class SingleDiodeModel(object):
     boltzmann_constant = 1.38065e-23
     charge_of_electron = 1.602e-19
@@ -13,6 +144,8 @@ class SingleDiodeModel(object):
     '''
     temperature_voltage_coefficient [V/ºC] not [%/ºC]
     temperature_current_coefficient [A/ºC] not [%/ºC]
+    temperature_tolerance [K] and irradiance_tolerance [W/m²]: operating conditions are rounded to multiples
+    of these values before calculating and caching (0 means exact values)
     '''
 
     def __init__(self,
@@ -24,7 +157,12 @@ class SingleDiodeModel(object):
                  temperature_current_coefficient=0.0032,
                  series_resistance=0.221,
                  shunt_resistance=415.405,
-                 diode_quality_factor=1.3):
+                 diode_quality_factor=1.3,
+                 current_tolerance=1e-9,
+                 maximum_number_of_iterations=100,
+                 cache_size=256,
+                 temperature_tolerance=0.0,
+                 irradiance_tolerance=0.0):
 
         self.number_of_voltage_decimal_digits = number_of_voltage_decimal_digits
 
@@ -38,13 +176,50 @@ class SingleDiodeModel(object):
         self.series_resistance = series_resistance
         self.shunt_resistance = shunt_resistance
         self.diode_quality_factor = diode_quality_factor
+        self.current_tolerance = current_tolerance
+        self.maximum_number_of_iterations = maximum_number_of_iterations
+        self.temperature_tolerance = temperature_tolerance
+        self.irradiance_tolerance = irradiance_tolerance
+
+        # Caches por ponto de operação escalar; as chaves incluem os parâmetros do modelo, de modo que alterar um
+        # atributo do modelo nunca devolve um resultado calculado com os valores antigos.
+        self.__nominal_parameters = (None, None)
+        self.__parameters_cache = _LeastRecentlyUsedCache(cache_size)
+        self.__curves_cache = _LeastRecentlyUsedCache(cache_size)
+        self.__maximum_power_points_cache = _LeastRecentlyUsedCache(cache_size)
+
+    def cache_statistics(self):
+        return {
+            'operating_parameters': self.__parameters_cache.statistics(),
+            'curves': self.__curves_cache.statistics(),
+            'maximum_power_points': self.__maximum_power_points_cache.statistics(),
+        }
+
+    def clear_cache(self):
+        self.__nominal_parameters = (None, None)
+        self.__parameters_cache.clear()
+        self.__curves_cache.clear()
+        self.__maximum_power_points_cache.clear()
 
-    def calculate(self, operating_temperature, actual_irradiance):
+    def calculate_operating_parameters(self, operating_temperature, actual_irradiance,
+                                       include_open_circuit_voltage=True):
+        # Aceita escalares ou matrizes (com broadcasting) de temperatura [K] e irradiância [W/m²].
+        # A tensão de circuito aberto exige uma busca de raiz; quem não precisa dela pode omiti-la.
+        operating_temperature, actual_irradiance = self.__quantize(operating_temperature, actual_irradiance)
 
-        nominal_thermal_voltage = self.__thermal_voltage(self.nominal_temperature)
+        if operating_temperature.ndim == 0 and actual_irradiance.ndim == 0:
+            key = (self.__model_key(), operating_temperature.item(), actual_irradiance.item(),
+                   include_open_circuit_voltage)
+            return dict(self.__parameters_cache.get_or_calculate(
+                key, lambda: self.__operating_parameters(operating_temperature, actual_irradiance,
+                                                         include_open_circuit_voltage)))
+
+        return self.__operating_parameters(operating_temperature, actual_irradiance, include_open_circuit_voltage)
+
+    def __operating_parameters(self, operating_temperature, actual_irradiance, include_open_circuit_voltage):
+        nominal_thermal_voltage, nominal_saturation_current = self.__nominal_thermal_voltage_and_saturation_current()
         operating_thermal_voltage = self.__thermal_voltage(operating_temperature)
 
-        nominal_saturation_current = self.__saturation_current(self.nominal_temperature, nominal_thermal_voltage)
         saturation_current = self.__saturation_current(operating_temperature, operating_thermal_voltage)
 
         actual_short_circuit_current = self.__actual_current(self.short_circuit_current, operating_temperature,
@@ -52,34 +227,246 @@ class SingleDiodeModel(object):
 
         photo_current = actual_short_circuit_current
 
-        actual_open_circuit_voltage = round(
-            self.__actual_voltage(photo_current, nominal_saturation_current, nominal_thermal_voltage,
-                                  self.open_circuit_voltage, operating_temperature),
-            self.number_of_voltage_decimal_digits)
+        # A tensão de circuito aberto só existe com corrente fotogerada positiva:
+        actual_open_circuit_voltage = numpy.zeros(numpy.shape(photo_current))
+        valid = numpy.isfinite(photo_current) & (photo_current > 0)
+        if include_open_circuit_voltage and numpy.any(valid):
+            actual_open_circuit_voltage[valid] = self.__actual_voltage(
+                photo_current[valid], nominal_saturation_current, nominal_thermal_voltage, self.open_circuit_voltage,
+                numpy.broadcast_to(operating_temperature, numpy.shape(photo_current))[valid])
+
+        return {
+            'thermal_voltage': operating_thermal_voltage,
+            'saturation_current': saturation_current,
+            'photo_current': photo_current,
+            'short_circuit_current': actual_short_circuit_current,
+            'open_circuit_voltage': actual_open_circuit_voltage,
+        }
+
+    def calculate(self, operating_temperature, actual_irradiance, out=None):
+        # Retorna um SingleDiodeModelResult imutável; o modelo não guarda estado do cálculo e pode ser usado por
+        # várias threads. Com out=(voltages, currents, powers), a curva é escrita diretamente nessas matrizes
+        # pré-alocadas (sem passar pelo cache) e o resultado usa os primeiros len(resultado) elementos delas.
+        operating_temperature, actual_irradiance = self.__quantize(operating_temperature, actual_irradiance)
+        if out is not None:
+            return self.__calculate_curve(operating_temperature, actual_irradiance, out)
+
+        key = (self.__model_key(), float(operating_temperature), float(actual_irradiance))
+        # Como o resultado é somente leitura, o mesmo objeto do cache é devolvido sem cópias
+        return self.__curves_cache.get_or_calculate(
+            key, lambda: self.__calculate_curve(operating_temperature, actual_irradiance))
+
+    def __calculate_curve(self, operating_temperature, actual_irradiance, out=None):
+        parameters = self.calculate_operating_parameters(operating_temperature, actual_irradiance)
+
+        operating_thermal_voltage = float(parameters['thermal_voltage'])
+        saturation_current = float(parameters['saturation_current'])
+        actual_short_circuit_current = float(parameters['short_circuit_current'])
+        photo_current = float(parameters['photo_current'])
+
+        # Com irradiância muito baixa a tensão de circuito aberto calculada pode ser nula ou negativa (amanhecer e
+        # anoitecer): ela é limitada a 0[V] e a curva se reduz ao ponto (0[V], Isc, 0[W])
+        actual_open_circuit_voltage = max(round(float(numpy.nan_to_num(parameters['open_circuit_voltage'])),
+                                                self.number_of_voltage_decimal_digits), 0.)
 
         # Certifique-se de levar em conta o número de casas decimais:
         number_of_elements = int(actual_open_circuit_voltage * 10 ** self.number_of_voltage_decimal_digits) + 1
 
-        self.voltages = numpy.linspace(0., actual_open_circuit_voltage, number_of_elements)
-        self.currents = numpy.zeros((1, number_of_elements)).flatten()
-        self.powers = numpy.zeros((1, number_of_elements)).flatten()
+        if out is None:
+            voltages, currents, powers = (numpy.empty(number_of_elements) for _ in range(3))
+        else:
+            if any(len(buffer) < number_of_elements for buffer in out):
+                raise ValueError(f"Output buffers must have at least {number_of_elements} elements")
+            voltages, currents, powers = (buffer[:number_of_elements] for buffer in out)
+
+        _fill_linear_grid(actual_open_circuit_voltage, voltages)
+        if number_of_elements == 1:
+            currents[0] = max(actual_short_circuit_current, 0.)
+            powers[0] = 0.
+            return SingleDiodeModelResult(operating_temperature, actual_irradiance, voltages, currents, powers)
+
+        currents[0] = actual_short_circuit_current
+        currents[-1] = 0.
+        powers[0] = 0.
+        powers[-1] = 0.
+
+        # O último elemento da corrente é mantido em 0[A] (e portanto o último elemento de potência em 0[W]),
+        # como no cálculo iterativo original; os pontos internos são resolvidos de uma só vez.
+        calculated_currents = self.__solve_currents(voltages[1:-1], photo_current, saturation_current,
+                                                    operating_thermal_voltage, out=currents[1:-1])
+        # A curva de um módulo isolado não tem trecho de corrente negativa (perto de Voc a tensão arredondada pode
+        # passar levemente do ponto em que I = 0). Arranjos com sombreamento parcial não usam esta curva:
+        # MultipleModulesSingleDiodeModel resolve a tensão de cada módulo diretamente, inclusive polarização reversa.
+        numpy.maximum(calculated_currents, 0.0, out=calculated_currents)
+
+        numpy.multiply(voltages[1:-1], currents[1:-1], out=powers[1:-1])
+
+        return SingleDiodeModelResult(operating_temperature, actual_irradiance, voltages, currents, powers)
+
+    def calculate_currents(self, operating_temperature, actual_irradiance, voltages):
+        # Corrente do módulo para tensões arbitrárias (escalares ou matrizes, com broadcasting entre condições de
+        # operação e tensões). Ao contrário das curvas, a corrente não é limitada a zero acima de Voc.
+        parameters = self.calculate_operating_parameters(operating_temperature, actual_irradiance,
+                                                         include_open_circuit_voltage=False)
+        voltages = numpy.asarray(voltages, dtype=float)
+        return self.__solve_currents(voltages, parameters['photo_current'], parameters['saturation_current'],
+                                     parameters['thermal_voltage'])
+
+    def calculate_maximum_power_point(self, operating_temperature, actual_irradiance, tolerance=1e-9):
+        # Resolve diretamente o ponto de máxima potência (Vmp, Imp, Pmp), sem gerar a curva P-V discretizada.
+        # A equação (1) de [1] é escrita em função da tensão no diodo Vd = V + I*Rs, o que torna I(Vd) e V(Vd)
+        # explícitas; a raiz de dP/dVd é obtida por Newton protegido por bisseção dentro do intervalo
+        # [0, Vd(I=0 sem Rsh)], onde dP/dVd troca de sinal. Aceita escalares ou matrizes de operação.
+        operating_temperature, actual_irradiance = self.__quantize(operating_temperature, actual_irradiance)
+
+        if operating_temperature.ndim == 0 and actual_irradiance.ndim == 0:
+            key = (self.__model_key(), operating_temperature.item(), actual_irradiance.item(), tolerance)
+            return self.__maximum_power_points_cache.get_or_calculate(
+                key, lambda: tuple(float(value) for value in self.__solve_maximum_power_point(
+                    operating_temperature, actual_irradiance, tolerance)))
+
+        # Medições repetem muitos pares (temperatura, irradiância): cada par distinto é resolvido uma única vez.
+        # A ordenação lexicográfica é bem mais rápida que numpy.unique(axis=0) em milhões de linhas.
+        operating_temperature, actual_irradiance = numpy.broadcast_arrays(operating_temperature, actual_irradiance)
+        temperatures, irradiances = operating_temperature.ravel(), actual_irradiance.ravel()
+        order = numpy.lexsort((irradiances, temperatures))
+        sorted_temperatures, sorted_irradiances = temperatures[order], irradiances[order]
+        first = numpy.ones(len(order), dtype=bool)
+        first[1:] = (sorted_temperatures[1:] != sorted_temperatures[:-1]) | (
+                sorted_irradiances[1:] != sorted_irradiances[:-1])
+        if numpy.all(first):
+            return self.__solve_maximum_power_point(operating_temperature, actual_irradiance, tolerance)
+
+        inverse = numpy.empty(len(order), dtype=numpy.intp)
+        inverse[order] = numpy.cumsum(first) - 1
+        solutions = self.__solve_maximum_power_point(sorted_temperatures[first], sorted_irradiances[first], tolerance)
+        return tuple(solution[inverse].reshape(operating_temperature.shape) for solution in solutions)
+
+    def __solve_maximum_power_point(self, operating_temperature, actual_irradiance, tolerance):
+        parameters = self.calculate_operating_parameters(operating_temperature, actual_irradiance,
+                                                         include_open_circuit_voltage=False)
+        photo_current = parameters['photo_current']
+        saturation_current = numpy.broadcast_to(parameters['saturation_current'], numpy.shape(photo_current))
+        modified_thermal_voltage = numpy.broadcast_to(
+            self.number_of_cells_in_series * parameters['thermal_voltage'], numpy.shape(photo_current))
+
+        valid = numpy.isfinite(photo_current) & (photo_current > 0)
+        iph = photo_current[valid]
+        io = saturation_current[valid]
+        a = modified_thermal_voltage[valid]
+        rs = self.series_resistance
+        rsh = self.shunt_resistance
+
+        def derivatives(diode_voltages):
+            exponential = io * numpy.exp(diode_voltages / a)
+            current = iph - (exponential - io) - diode_voltages / rsh
+            d_current = -exponential / a - 1 / rsh
+            dd_current = -exponential / a ** 2
+            voltage = diode_voltages - rs * current
+            d_voltage = 1 - rs * d_current
+            dd_voltage = -rs * dd_current
+            d_power = d_voltage * current + voltage * d_current
+            dd_power = dd_voltage * current + 2 * d_voltage * d_current + voltage * dd_current
+            return voltage, current, d_power, dd_power
+
+        lower = numpy.zeros_like(iph)
+        upper = a * numpy.log1p(iph / io)
+        diode_voltages = 0.5 * (lower + upper)
 
-        self.currents[0] = actual_short_circuit_current
+        for _ in range(self.maximum_number_of_iterations):
+            _, _, d_power, dd_power = derivatives(diode_voltages)
+            lower = numpy.where(d_power > 0, diode_voltages, lower)
+            upper = numpy.where(d_power > 0, upper, diode_voltages)
 
-        # O último elemento da corrente não se torna 0 com base no cálculo iterativo abaixo.
-        # Portanto, o loop for abaixo é interrompido no elemento anterior ao último.
-        # Assim, o valor do último elemento de corrente permanece 0[A] e também o último elemento de potência permanece 0[W].
-        for i in range(1, number_of_elements - 1):
-            calculated_current = self.__current(self.voltages[i], self.currents[i - 1], photo_current,
-                                                saturation_current, operating_thermal_voltage)
-            # Nota: O seguinte é um ajuste rápido para evitar corrente negativa em MultipleModulesSingleDiodeModel
-            #       quando se usa series_resistance, shunt_resistance, and diode_quality_factor para nominal_irradiance no caso de sombreamento parcial..
-            # TODO: Modificar para calcular esses valores com base na irradiância sob sombreamento parcial usando root_finding.
-            if calculated_current < 0.0:
-                calculated_current = 0.0
-            self.currents[i] = calculated_current
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                candidates = diode_voltages - d_power / dd_power
+            # Passo de Newton fora do intervalo (ou indefinido) é substituído por bisseção:
+            outside = ~((candidates > lower) & (candidates < upper))
+            candidates = numpy.where(outside, 0.5 * (lower + upper), candidates)
 
-            self.powers[i] = self.voltages[i] * self.currents[i]
+            converged = numpy.abs(candidates - diode_voltages) <= tolerance
+            diode_voltages = candidates
+            if numpy.all(converged):
+                break
+
+        voltage, current, _, _ = derivatives(diode_voltages)
+
+        maximum_power_voltages = numpy.zeros(numpy.shape(photo_current))
+        maximum_power_currents = numpy.zeros(numpy.shape(photo_current))
+        maximum_power_voltages[valid] = voltage
+        maximum_power_currents[valid] = current
+        maximum_powers = maximum_power_voltages * maximum_power_currents
+
+        return maximum_power_voltages, maximum_power_currents, maximum_powers
+
+    def calculate_batch(self, operating_temperatures, actual_irradiances, number_of_voltage_points=101):
+        # Calcula de uma só vez as curvas de vários pontos de operação (temperaturas [K] e irradiâncias [W/m²]),
+        # sobre uma grade de tensão normalizada compartilhada (0 a 1 da tensão de circuito aberto de cada ponto).
+        operating_temperatures, actual_irradiances = numpy.broadcast_arrays(
+            numpy.asarray(operating_temperatures, dtype=float).ravel(),
+            numpy.asarray(actual_irradiances, dtype=float).ravel())
+
+        with numpy.errstate(invalid='ignore'):
+            parameters = self.calculate_operating_parameters(operating_temperatures, actual_irradiances)
+
+        # Pontos em que a tensão de circuito aberto não pôde ser determinada são tratados como sem geração:
+        open_circuit_voltages = numpy.nan_to_num(parameters['open_circuit_voltage'], nan=0.0)
+        valid = open_circuit_voltages > 0
+
+        normalized_voltages = numpy.linspace(0., 1., number_of_voltage_points)
+        voltages = open_circuit_voltages[:, numpy.newaxis] * normalized_voltages
+        currents = numpy.zeros_like(voltages)
+
+        if numpy.any(valid):
+            calculated_currents = self.__solve_currents(voltages[valid],
+                                                        parameters['photo_current'][valid, numpy.newaxis],
+                                                        parameters['saturation_current'][valid, numpy.newaxis],
+                                                        parameters['thermal_voltage'][valid, numpy.newaxis])
+            currents[valid] = numpy.maximum(calculated_currents, 0.0)
+
+        powers = voltages * currents
+
+        maximum_power_voltages, maximum_power_currents, maximum_powers = self.calculate_maximum_power_point(
+            operating_temperatures, numpy.where(valid, actual_irradiances, 0.0))
+
+        return {
+            'normalized_voltages': normalized_voltages,
+            'voltages': voltages,
+            'currents': currents,
+            'powers': powers,
+            'open_circuit_voltages': open_circuit_voltages,
+            'short_circuit_currents': numpy.where(valid, parameters['short_circuit_current'], 0.0),
+            'maximum_power_voltages': maximum_power_voltages,
+            'maximum_power_currents': maximum_power_currents,
+            'maximum_powers': maximum_powers,
+        }
+
+    def __quantize(self, operating_temperature, actual_irradiance):
+        # Arredonda as condições de operação para múltiplos das tolerâncias (chaves de cache mais frequentes)
+        operating_temperature = numpy.asarray(operating_temperature, dtype=float)
+        actual_irradiance = numpy.asarray(actual_irradiance, dtype=float)
+        if self.temperature_tolerance > 0:
+            operating_temperature = numpy.round(operating_temperature / self.temperature_tolerance) * \
+                                    self.temperature_tolerance
+        if self.irradiance_tolerance > 0:
+            actual_irradiance = numpy.round(actual_irradiance / self.irradiance_tolerance) * self.irradiance_tolerance
+        return operating_temperature, actual_irradiance
+
+    def __model_key(self):
+        return (self.short_circuit_current, self.open_circuit_voltage, self.number_of_cells_in_series,
+                self.number_of_voltage_decimal_digits, self.temperature_voltage_coefficient,
+                self.temperature_current_coefficient, self.series_resistance, self.shunt_resistance,
+                self.diode_quality_factor, self.current_tolerance, self.maximum_number_of_iterations)
+
+    def __nominal_thermal_voltage_and_saturation_current(self):
+        # A tensão térmica e a corrente de saturação nominais dependem apenas dos parâmetros do modelo
+        key, values = self.__nominal_parameters
+        if key != self.__model_key():
+            nominal_thermal_voltage = self.__thermal_voltage(self.nominal_temperature)
+            values = (nominal_thermal_voltage,
+                      self.__saturation_current(self.nominal_temperature, nominal_thermal_voltage))
+            self.__nominal_parameters = (self.__model_key(), values)
+        return values
 
     def __convert_to_float(self, value):
         if isinstance(value, float):
@@ -94,22 +481,47 @@ class SingleDiodeModel(object):
     def __nominal_saturation_current(self, thermal_voltage):
         # O seguinte é baseado na equação (6) de [2], mas a tensão térmica é definida como a equação (2) de [1], que inclui o fator de qualidade do diodo e não inclui o número de células em série, e assim a seguinte equação é modificada de acordo:
         return self.short_circuit_current / (
-                exp(self.open_circuit_voltage / (self.number_of_cells_in_series * thermal_voltage)) - 1)
+                numpy.exp(self.open_circuit_voltage / (self.number_of_cells_in_series * thermal_voltage)) - 1)
 
     def __saturation_current(self, operating_temperature, thermal_voltage):
         # O seguinte é baseado na equação (7) de [2], mas a tensão térmica é definida como a equação (2) de [1], que inclui o fator de qualidade do diodo e não inclui o número de células em série, e assim a seguinte equação é modificada de acordo:
         return (self.short_circuit_current + self.temperature_current_coefficient * (
-                operating_temperature - self.nominal_temperature)) / (exp((
+                operating_temperature - self.nominal_temperature)) / (numpy.exp((
                                                                                   self.open_circuit_voltage + self.temperature_voltage_coefficient * (
                                                                                   operating_temperature - self.nominal_temperature)) / (
                                                                                   self.number_of_cells_in_series * thermal_voltage)) - 1)
 
     def __current(self, voltage, current, photo_current, saturation_current, operating_thermal_voltage):
         # Baseado na equação (1) de [1] (a tensão térmica é definida como a equação (2) de [1], que inclui o fator de qualidade do diodo e não inclui o número de células em série):
-        return photo_current - saturation_current * (exp((voltage + current * self.series_resistance) / (
+        return photo_current - saturation_current * (numpy.exp((voltage + current * self.series_resistance) / (
                 self.number_of_cells_in_series * operating_thermal_voltage)) - 1) - (
                 (voltage + current * self.series_resistance) / self.shunt_resistance)
 
+    def __solve_currents(self, voltages, photo_current, saturation_current, operating_thermal_voltage, out=None):
+        # Iterações de Newton vetorizadas sobre a equação implícita I = __current(V, I).
+        # O resíduo f(I) = __current(V, I) - I é côncavo e decrescente em I e f(photo_current) <= 0 para V >= 0,
+        # portanto partindo de I = photo_current as iterações convergem monotonicamente para a raiz.
+        modified_thermal_voltage = self.number_of_cells_in_series * operating_thermal_voltage
+        # Com out, as iterações são feitas diretamente na matriz fornecida
+        if out is None:
+            currents = numpy.array(numpy.broadcast_to(photo_current, numpy.shape(voltages)), dtype=float)
+        else:
+            currents = out
+            currents[...] = photo_current
+
+        for _ in range(self.maximum_number_of_iterations):
+            residuals = self.__current(voltages, currents, photo_current, saturation_current,
+                                       operating_thermal_voltage) - currents
+            derivatives = -saturation_current * self.series_resistance / modified_thermal_voltage * numpy.exp(
+                (voltages + currents * self.series_resistance) / modified_thermal_voltage) - (
+                    self.series_resistance / self.shunt_resistance) - 1
+            steps = residuals / derivatives
+            currents -= steps
+            if numpy.all(numpy.abs(steps) <= self.current_tolerance):
+                break
+
+        return currents
+
     def __actual_current(self, nominal_current, operating_temperature, actual_irradiance):
         # Baseado na equação (4) de [2], que usa [A/ºC] como unidade do coeficiente de temperatura da corrente (Nota: Alguns datasheets usam [%/ºC] como unidade):
         return (actual_irradiance / self.nominal_irradiance) * (
@@ -118,14 +530,17 @@ class SingleDiodeModel(object):
 
     def __actual_voltage(self, photo_current, saturation_current, nominal_thermal_voltage, nominal_voltage,
                          operating_temperature):
-        # TODO: A curva I-V e a curva P-V têm uma queda acentuada perto da tensão de circuito aberto quando a dependência de irradiância é levada em conta
+        # Esta tensão de circuito aberto (equações de [1]) não é exatamente a raiz I = 0 da equação do diodo; com
+        # irradiância baixa ela fica abaixo da raiz e, como a curva I-V termina nela com I = 0[A], as curvas I-V e P-V
+        # têm uma queda acentuada no último passo de tensão. O comportamento é mantido porque Voc é o valor reportado.
         # Dependência da irradiância:
         single_voltage_irradiance_dependence = SingleVoltageIrradianceDependence(photo_current,
                                                                                  saturation_current,
                                                                                  self.shunt_resistance,
                                                                                  self.number_of_cells_in_series,
                                                                                  nominal_thermal_voltage)
-        irradiance_dependent_voltage = single_voltage_irradiance_dependence.calculate(nominal_voltage)
+        irradiance_dependent_voltage = single_voltage_irradiance_dependence.calculate(
+            numpy.full(numpy.shape(photo_current), nominal_voltage))
 
         # Dependência da temperatura:
         # Baseado na equação (24) de [1], mas levando em conta que a unidade do coeficiente de temperatura da tensão é [V/ºC] em vez de [%/ºC]. (Nota: Diferentes datasheets usam uma ou outra dessas unidades):
@@ -0,0 +1,193 @@
+import numpy
+from scipy import optimize
+
+from single_diode_model import SingleDiodeModel
+
+# Parâmetros ajustados: resistência série [Ohm], resistência paralela [Ohm] e fator de qualidade do diodo.
+# A corrente de saturação não é um parâmetro livre: o modelo a obtém de Isc, Voc e do fator de qualidade.
+fitted_parameters = ('series_resistance', 'shunt_resistance', 'diode_quality_factor')
+default_initial_parameters = (0.2, 400., 1.2)
+default_bounds = ((1e-4, 1., 0.5), (2., 1e5, 2.5))
+
+
+def create_model(model, parameters):
+    # Cópia do modelo com outros valores de Rs, Rsh e n (sem cache: cada avaliação do ajuste é única)
+    return SingleDiodeModel(model.short_circuit_current, model.open_circuit_voltage, model.number_of_cells_in_series,
+                            number_of_voltage_decimal_digits=model.number_of_voltage_decimal_digits,
+                            temperature_voltage_coefficient=model.temperature_voltage_coefficient,
+                            temperature_current_coefficient=model.temperature_current_coefficient,
+                            current_tolerance=model.current_tolerance,
+                            maximum_number_of_iterations=model.maximum_number_of_iterations,
+                            cache_size=0,
+                            **dict(zip(fitted_parameters, parameters)))
+
+
+def nominal_saturation_current(model):
+    # Corrente de saturação nas condições nominais (25 ºC, 1000 W/m²), como o modelo a calcula
+    return float(model.calculate_operating_parameters(model.nominal_temperature, model.nominal_irradiance,
+                                                      include_open_circuit_voltage=False)['saturation_current'])
+
+
+def extract_parameters_from_datasheet(short_circuit_current, open_circuit_voltage, maximum_power_voltage,
+                                      maximum_power_current, number_of_cells_in_series, initial_parameters=None,
+                                      bounds=default_bounds, **model_arguments):
+    # Ajusta Rs, Rsh e n aos pontos do datasheet nas condições nominais. Os resíduos (normalizados por Isc) são:
+    #   I(Vmp) = Imp, dP/dV(Vmp) = 0, I(0) = Isc e I(Voc) = 0.
+    # Retorna (parâmetros, diagnóstico); os parâmetros podem ser passados diretamente ao SingleDiodeModel.
+    model = SingleDiodeModel(short_circuit_current, open_circuit_voltage, number_of_cells_in_series,
+                             cache_size=0, **model_arguments)
+    temperature, irradiance = model.nominal_temperature, model.nominal_irradiance
+    voltages = numpy.array([0., maximum_power_voltage, model.open_circuit_voltage])
+
+    def residuals(parameters):
+        candidate = create_model(model, parameters)
+        short_circuit, maximum_power, open_circuit = candidate.calculate_currents(temperature, irradiance, voltages)
+        # Derivada da equação implícita: dI/dV = -g / (1 + g Rs), com g = Io/a exp((V + I Rs)/a) + 1/Rsh
+        operating_parameters = candidate.calculate_operating_parameters(temperature, irradiance,
+                                                                        include_open_circuit_voltage=False)
+        a = number_of_cells_in_series * operating_parameters['thermal_voltage']
+        conductance = operating_parameters['saturation_current'] / a * numpy.exp(
+            (maximum_power_voltage + maximum_power * parameters[0]) / a) + 1 / parameters[1]
+        derivative = -conductance / (1 + conductance * parameters[0])
+        return numpy.array([maximum_power - maximum_power_current,
+                            maximum_power + maximum_power_voltage * derivative,
+                            short_circuit - short_circuit_current,
+                            open_circuit]) / short_circuit_current
+
+    solution = optimize.least_squares(residuals, initial_parameters or default_initial_parameters, bounds=bounds,
+                                      x_scale='jac')
+    parameters = dict(zip(fitted_parameters, (float(value) for value in solution.x)))
+
+    fitted_model = create_model(model, solution.x)
+    maximum_power_point = fitted_model.calculate_maximum_power_point(temperature, irradiance)
+    # Os quatro pontos do datasheet não determinam bem Rsh (ele tende ao limite superior): parâmetros sobre um
+    # limite são listados e o ajuste não é considerado bem-sucedido
+    at_bounds = parameters_at_bounds(solution.x, bounds)
+    return parameters, {
+        'saturation_current': nominal_saturation_current(fitted_model),
+        'residuals': solution.fun,
+        'maximum_power_point': maximum_power_point,
+        'maximum_power_error': maximum_power_point[2] - maximum_power_voltage * maximum_power_current,
+        'parameters_at_bounds': at_bounds,
+        'success': bool(solution.success) and not at_bounds,
+    }
+
+
+def select_measurements(voltages, currents, powers=None, actual_irradiances=None, minimum_irradiance=200.,
+                        power_tolerance=0.05, maximum_number_of_samples=20000):
+    # Índices das medições úteis para o ajuste: com geração, irradiância suficiente e (se a potência medida for
+    # informada) V*I coerente com a potência. Amostras excedentes são descartadas com passo uniforme.
+    voltages = numpy.asarray(voltages, dtype=float)
+    currents = numpy.asarray(currents, dtype=float)
+    valid = numpy.isfinite(voltages) & numpy.isfinite(currents) & (voltages > 0) & (currents > 0)
+    if actual_irradiances is not None:
+        valid &= numpy.asarray(actual_irradiances, dtype=float) >= minimum_irradiance
+    if powers is not None:
+        powers = numpy.asarray(powers, dtype=float)
+        valid &= numpy.abs(voltages * currents - powers) <= power_tolerance * numpy.abs(powers)
+
+    indices = numpy.flatnonzero(valid)
+    if len(indices) > maximum_number_of_samples:
+        indices = indices[numpy.linspace(0, len(indices) - 1, maximum_number_of_samples).astype(int)]
+    return indices
+
+
+def parameters_at_bounds(parameters, bounds=default_bounds, relative_tolerance=1e-4):
+    # Nomes dos parâmetros que terminaram (praticamente) sobre um limite: não são determinados pelos dados
+    lower, upper = (numpy.asarray(bound, dtype=float) for bound in bounds)
+    values = numpy.asarray(parameters, dtype=float)
+    tolerance = relative_tolerance * (upper - lower)
+    at_bounds = (values - lower <= tolerance) | (upper - values <= tolerance)
+    return [name for name, flag in zip(fitted_parameters, at_bounds) if flag]
+
+
+def refine_parameters_with_measurements(model, operating_temperatures, actual_irradiances, voltages, currents,
+                                        powers=None, number_of_modules_in_series=None,
+                                        number_of_strings_in_parallel=None, bounds=default_bounds,
+                                        minimum_irradiance=200., maximum_number_of_samples=20000,
+                                        number_of_screening_samples=2000):
+    # Refina Rs, Rsh e n do modelo com medições (temperatura [K], irradiância incidente [W/m²], tensão [V] e
+    # corrente [A] de uma string ou arranjo). O resíduo de cada amostra é a diferença entre a corrente do modelo na
+    # tensão medida e a corrente medida, avaliada de uma só vez para todas as amostras; a perda soft_l1 reduz o peso
+    # de medições discrepantes.
+    # Sem o número de módulos em série e/ou strings em paralelo, a razão entre a medição e o ponto de máxima
+    # potência do modelo dá apenas uma estimativa inicial (as medições não estão exatamente no MPP): os números
+    # vizinhos são ajustados numa amostra reduzida e o de menor erro de corrente é usado no ajuste final.
+    indices = select_measurements(voltages, currents, powers, actual_irradiances, minimum_irradiance,
+                                  maximum_number_of_samples=maximum_number_of_samples)
+    if len(indices) == 0:
+        raise ValueError("No valid measurements to fit the model parameters")
+
+    operating_temperatures = numpy.broadcast_to(numpy.asarray(operating_temperatures, dtype=float),
+                                                numpy.shape(voltages))[indices]
+    actual_irradiances = numpy.asarray(actual_irradiances, dtype=float)[indices]
+    voltages = numpy.asarray(voltages, dtype=float)[indices]
+    currents = numpy.asarray(currents, dtype=float)[indices]
+    samples = (operating_temperatures, actual_irradiances, voltages, currents)
+
+    candidate_errors = None
+    if number_of_modules_in_series is None or number_of_strings_in_parallel is None:
+        maximum_power_voltages, maximum_power_currents, _ = model.calculate_maximum_power_point(
+            operating_temperatures, actual_irradiances)
+        usable = (maximum_power_voltages > 0) & (maximum_power_currents > 0)
+        if number_of_modules_in_series is None:
+            estimate = max(int(numpy.round(numpy.median(voltages[usable] / maximum_power_voltages[usable]))), 1)
+            series_candidates = range(max(estimate - 2, 1), estimate + 3)
+        else:
+            series_candidates = [number_of_modules_in_series]
+        if number_of_strings_in_parallel is None:
+            estimate = max(int(numpy.round(numpy.median(currents[usable] / maximum_power_currents[usable]))), 1)
+            parallel_candidates = range(max(estimate - 1, 1), estimate + 2)
+        else:
+            parallel_candidates = [number_of_strings_in_parallel]
+
+        screening = numpy.linspace(0, len(indices) - 1, min(number_of_screening_samples, len(indices))).astype(int)
+        screening_samples = tuple(values[screening] for values in samples)
+        candidate_errors = {}
+        for series in series_candidates:
+            for parallel in parallel_candidates:
+                solution, _, scale = _fit_measurements(model, screening_samples, series, parallel, bounds)
+                candidate_errors[(series, parallel)] = _root_mean_square(solution.fun * scale)
+        number_of_modules_in_series, number_of_strings_in_parallel = min(candidate_errors, key=candidate_errors.get)
+
+    solution, initial_residuals, scale = _fit_measurements(model, samples, number_of_modules_in_series,
+                                                           number_of_strings_in_parallel, bounds)
+    parameters = dict(zip(fitted_parameters, (float(value) for value in solution.x)))
+    at_bounds = parameters_at_bounds(solution.x, bounds)
+
+    return parameters, {
+        'saturation_current': nominal_saturation_current(create_model(model, solution.x)),
+        'number_of_samples': len(indices),
+        'number_of_modules_in_series': number_of_modules_in_series,
+        'number_of_strings_in_parallel': number_of_strings_in_parallel,
+        # Erro de corrente [A] de cada combinação (série, paralelo) testada, quando os números foram ajustados
+        'candidate_current_rmse': candidate_errors,
+        # Erros quadráticos médios da corrente [A] e da potência [W] antes e depois do ajuste
+        'initial_current_rmse': _root_mean_square(initial_residuals * scale),
+        'current_rmse': _root_mean_square(solution.fun * scale),
+        'initial_power_rmse': _root_mean_square(initial_residuals * scale * voltages),
+        'power_rmse': _root_mean_square(solution.fun * scale * voltages),
+        'parameters_at_bounds': at_bounds,
+        'success': bool(solution.success) and not at_bounds,
+    }
+
+
+def _fit_measurements(model, samples, number_of_modules_in_series, number_of_strings_in_parallel, bounds):
+    operating_temperatures, actual_irradiances, voltages, currents = samples
+    module_voltages = voltages / number_of_modules_in_series
+    scale = number_of_strings_in_parallel * model.short_circuit_current
+
+    def residuals(parameters):
+        model_currents = create_model(model, parameters).calculate_currents(
+            operating_temperatures, actual_irradiances, module_voltages)
+        return (number_of_strings_in_parallel * model_currents - currents) / scale
+
+    initial_parameters = numpy.clip([getattr(model, name) for name in fitted_parameters], *bounds)
+    initial_residuals = residuals(initial_parameters)
+    solution = optimize.least_squares(residuals, initial_parameters, bounds=bounds, x_scale='jac', loss='soft_l1',
+                                      f_scale=0.05)
+    return solution, initial_residuals, scale
+
+
+def _root_mean_square(values):
+    return float(numpy.sqrt(numpy.mean(values ** 2)))
@@ -1,4 +1,6 @@
-from math import log
+from functools import lru_cache
+
+import numpy
 from scipy import optimize
 
 
@@ -39,22 +41,69 @@ class SingleVoltageIrradianceDependence(object):
         return self.__nominal_thermal_voltage
 
     def calculate(self, voltage_estimation):
+        # Aceita correntes fotogeradas, correntes de saturação e estimativas escalares ou em matrizes.
+        # Entradas escalares são memorizadas; em matrizes, combinações repetidas são resolvidas uma única vez.
+        photo_currents, saturation_currents, voltage_estimations = numpy.broadcast_arrays(
+            numpy.asarray(self.iph(), dtype=float), numpy.asarray(self.io(), dtype=float),
+            numpy.asarray(voltage_estimation, dtype=float))
+
+        if photo_currents.size == 1:
+            solution = _solve_open_circuit_voltage(photo_currents.item(), saturation_currents.item(), self.rsh(),
+                                                   self.ns(), self.vt(), voltage_estimations.item(),
+                                                   self.__number_of_iterations)
+            return solution if photo_currents.ndim == 0 else numpy.full(photo_currents.shape, solution)
+
+        inputs = numpy.stack([photo_currents.ravel(), saturation_currents.ravel(), voltage_estimations.ravel()], axis=1)
+        unique_inputs, inverse = numpy.unique(inputs, axis=0, return_inverse=True)
+        solution = _solve_open_circuit_voltages(unique_inputs[:, 0], unique_inputs[:, 1], unique_inputs[:, 2],
+                                                self.rsh(), self.ns(), self.vt(), self.__number_of_iterations)
+
+        return solution[inverse.ravel()].reshape(photo_currents.shape)
+
+
+# Based on equation (23) of [1], x = ns*vt*log((iph*rsh - x)/(io*rsh)).
+# With y = log((iph*rsh - x)/(io*rsh)) it becomes g(y) = io*rsh*exp(y) + ns*vt*y - iph*rsh = 0,
+# which is convex and increasing in y and has no domain restriction, so Newton with the analytic
+# derivative converges from any estimate (the logarithm of the original form is undefined for x >= iph*rsh).
+def _solve_open_circuit_voltages(photo_currents, saturation_currents, voltage_estimations, shunt_resistance,
+                                 number_of_cells_in_series, nominal_thermal_voltage, number_of_iterations):
+    rsh = shunt_resistance
+    modified_thermal_voltage = number_of_cells_in_series * nominal_thermal_voltage
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        estimations = numpy.log((photo_currents * rsh - voltage_estimations) / (saturation_currents * rsh))
+        # g(log(iph/io)) > 0, so this start is on the side where Newton converges monotonically:
+        estimations = numpy.where(numpy.isfinite(estimations), estimations,
+                                  numpy.log(photo_currents / saturation_currents))
+
+    valid = numpy.isfinite(estimations)
+    solution = numpy.full(numpy.shape(photo_currents), numpy.nan)
+    if not numpy.any(valid):
+        return solution
 
-        if self.__number_of_iterations is None:
-            solution = optimize.newton(self.__function, voltage_estimation)
-        # solution = optimize.fsolve(self.__function, voltage_estimation)
-        else:
-            solution = optimize.newton(self.__function, voltage_estimation, maxiter=self.__number_of_iterations)
-        # solution = optimize.fsolve(self.__function, voltage_estimation, maxfev = self.__number_of_iterations)
+    iph = photo_currents[valid]
+    io = saturation_currents[valid]
 
-        return solution
+    def function(y):
+        return io * rsh * numpy.exp(y) + modified_thermal_voltage * y - iph * rsh
+
+    def derivative(y):
+        return io * rsh * numpy.exp(y) + modified_thermal_voltage
 
-    def __function(self, unknown_voltage):
+    if number_of_iterations is None:
+        y = optimize.newton(function, estimations[valid], fprime=derivative)
+    else:
+        y = optimize.newton(function, estimations[valid], fprime=derivative, maxiter=number_of_iterations)
 
-        x = unknown_voltage
+    solution[valid] = iph * rsh - io * rsh * numpy.exp(y)
+    return solution
 
-        # Based on equation (23) of [1]:
-        # In the form "... = 0"
-        # meth.log is natural logarithm:
 
-        return log((self.iph() * self.rsh() - x) / (self.io() * self.rsh())) * self.ns() * self.vt() - x
+# Memoized scalar solution, so repeated identical operating points skip the root-finding:
+@lru_cache(maxsize=4096)
+def _solve_open_circuit_voltage(photo_current, saturation_current, shunt_resistance, number_of_cells_in_series,
+                                nominal_thermal_voltage, voltage_estimation, number_of_iterations):
+    return float(_solve_open_circuit_voltages(numpy.array([photo_current]), numpy.array([saturation_current]),
+                                              numpy.array([voltage_estimation]), shunt_resistance,
+                                              number_of_cells_in_series, nominal_thermal_voltage,
+                                              number_of_iterations)[0])
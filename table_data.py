@@ -1,28 +1,73 @@
+import threading
 from datetime import datetime
 import pandas as pd
 import numpy as np
 
-# Defina a URL ou caminho do arquivo CSV
-url = "https://docs.google.com/spreadsheets/d/1W1V5ExxROoVLTQAdsYKVv98rweN_bEoSwFwct9DN3Ao/gviz/tq?tqx=out:csv"
+from data_loader import carregar_dados, colunas_numericas
+from geometria_solar import calcular_geometria_solar
 
-# Carregar a planilha com base na disponibilidade da URL ou caminho do arquivo
-try:
-    # Tente carregar a partir da URL
-    df = pd.read_csv(url)
-    # print(df)
-except Exception as e:
-    print(f"Não foi possível carregar os dados da URL: {e}. Tentando carregar do arquivo local.")
 
-# Convertendo a coluna 'Data_Hora' para datetime, inferindo o formato e usando dayfirst=True
-df['Data_Hora'] = pd.to_datetime(df['Data_Hora'], format='%d/%m/%y %H:%M', dayfirst=True, errors='coerce')
+# Dados de medição compartilhados (carregados no primeiro acesso a table_data.df, uma única vez por processo)
+def __getattr__(nome):
+    if nome == 'df':
+        return carregar_dados()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
 
-# Convertendo colunas numéricas que estão como string (com vírgulas) para float
-colunas_numericas = ['Radiação', 'Temp_Cel', 'Temp_Amb', 'Tensao_S1_Avg', 'Corrente_S1_Avg',
-                     'Potencia_S1_Avg', 'Tensao_S2_Avg', 'Corrente_S2_Avg', 'Potencia_S2_Avg',
-                     'Potencia_FV_Avg', 'Demanda_Avg', 'FP_FV_Avg', 'Tensao_Rede_Avg']
 
-for coluna in colunas_numericas:
-    df[coluna] = df[coluna].astype(str).str.replace(',', '.').astype(float)
+# Índice temporal (instantes ordenados em minutos e posições correspondentes no df), criado no primeiro uso
+_indice_temporal = None
+
+# Colunas do df já copiadas na ordem do índice temporal
+_colunas_ordenadas = {}
+
+# Posições (início, fim) no índice temporal de cada hora com dados, por hora inteira desde a época
+_limites_horas = None
+
+# Trava da construção dos índices acima (vários cálculos em segundo plano podem pedi-los ao mesmo tempo)
+_trava_indices = threading.RLock()
+
+
+# Função para converter datas/horas em minutos inteiros desde a época
+def _para_minutos(data_hora):
+    return np.asarray(data_hora, dtype='datetime64[m]').astype(np.int64)
+
+
+# Função para montar o índice temporal ordenado (ordenação estável: a primeira ocorrência vem primeiro)
+def _obter_indice_temporal():
+    global _indice_temporal
+    if _indice_temporal is None:
+        with _trava_indices:
+            if _indice_temporal is None:
+                data_hora = carregar_dados()['Data_Hora'].to_numpy()
+                validos = np.flatnonzero(~np.isnat(data_hora))
+                minutos = _para_minutos(data_hora[validos])
+                ordem = np.argsort(minutos, kind='stable')
+                _indice_temporal = (minutos[ordem], validos[ordem])
+    return _indice_temporal
+
+
+# Função para montar, uma única vez, o mapa de cada hora para as suas linhas no índice temporal.
+# Como o índice é ordenado, as linhas de uma hora formam sempre uma fatia contígua.
+def _obter_limites_horas():
+    global _limites_horas
+    if _limites_horas is None:
+        with _trava_indices:
+            if _limites_horas is None:
+                minutos, _ = _obter_indice_temporal()
+                horas, inicios = np.unique(minutos // 60, return_index=True)
+                fins = np.append(inicios[1:], len(minutos))
+                _limites_horas = dict(zip(horas.tolist(), zip(inicios.tolist(), fins.tolist())))
+    return _limites_horas
+
+
+# Função para obter uma coluna do df como matriz contígua na ordem do índice temporal
+def _coluna_ordenada(coluna):
+    if coluna not in _colunas_ordenadas:
+        with _trava_indices:
+            if coluna not in _colunas_ordenadas:
+                _, posicoes = _obter_indice_temporal()
+                _colunas_ordenadas[coluna] = np.ascontiguousarray(carregar_dados()[coluna].to_numpy()[posicoes])
+    return _colunas_ordenadas[coluna]
 
 
 # Função para obter dados de temperatura e irradiância da planilha
@@ -30,14 +75,59 @@ def obter_dados_data_hora(data_selecionada, hora_selecionada):
     # Converter a data e hora selecionadas para o formato datetime da coluna 'Data_Hora'
     data_hora_selecionada = pd.to_datetime(f"{data_selecionada} {hora_selecionada}", format='%d/%m/%y %H:%M')
 
-    # Filtrar os dados com base na data e hora selecionada
-    dados_hora = df[df['Data_Hora'] == data_hora_selecionada]
+    # Busca binária no índice temporal em vez de comparar todas as linhas
+    minutos, posicoes = _obter_indice_temporal()
+    minuto = _para_minutos(data_hora_selecionada.to_datetime64())
+    i = np.searchsorted(minutos, minuto)
 
-    if dados_hora.empty:
+    if i == len(minutos) or minutos[i] != minuto:
         print(f"Não há dados disponíveis para a data {data_selecionada} e hora {hora_selecionada}.")
         return None
 
-    return dados_hora.iloc[0]
+    return carregar_dados().iloc[posicoes[i]]
+
+
+# Função para obter todas as linhas de um intervalo [inicio, fim) como matrizes NumPy contíguas
+# (inicio ou fim iguais a None significam o começo ou o final do conjunto de dados)
+def obter_dados_intervalo(inicio, fim, colunas=None):
+    minutos, _ = _obter_indice_temporal()
+    i = 0 if inicio is None else np.searchsorted(minutos, _para_minutos(pd.Timestamp(inicio).to_datetime64()))
+    j = len(minutos) if fim is None else np.searchsorted(minutos, _para_minutos(pd.Timestamp(fim).to_datetime64()))
+
+    if colunas is None:
+        colunas = list(carregar_dados().columns)
+
+    return {coluna: _coluna_ordenada(coluna)[i:j] for coluna in colunas}
+
+
+# Função para obter todas as linhas de um dia (data no formato dd/mm/aa)
+def obter_dados_dia(data_selecionada, colunas=None):
+    inicio = pd.to_datetime(data_selecionada, format='%d/%m/%y')
+    return obter_dados_intervalo(inicio, inicio + pd.Timedelta(days=1), colunas)
+
+
+# Função para obter as linhas de uma hora de um dia (data no formato dd/mm/aa) como fatias contíguas, sem filtrar o df
+def obter_dados_hora(data_selecionada, hora, colunas=None):
+    dia = pd.to_datetime(data_selecionada, format='%d/%m/%y').to_datetime64().astype('datetime64[h]')
+    i, j = _obter_limites_horas().get(int(dia.astype(np.int64)) + int(hora), (0, 0))
+
+    if colunas is None:
+        colunas = list(carregar_dados().columns)
+
+    return {coluna: _coluna_ordenada(coluna)[i:j] for coluna in colunas}
+
+
+# Função para listar os dias com dados (formato dd/mm/aa), opcionalmente entre inicio e fim (inclusive)
+def datas_disponiveis(inicio=None, fim=None):
+    minutos, _ = _obter_indice_temporal()
+    dias = np.unique(minutos // (24 * 60)).astype('datetime64[D]')
+
+    if inicio is not None:
+        dias = dias[dias >= pd.to_datetime(inicio, format='%d/%m/%y').to_datetime64().astype('datetime64[D]')]
+    if fim is not None:
+        dias = dias[dias <= pd.to_datetime(fim, format='%d/%m/%y').to_datetime64().astype('datetime64[D]')]
+
+    return [pd.Timestamp(dia).strftime('%d/%m/%y') for dia in dias]
 
 
 # Funções para conversão de ângulos
@@ -55,46 +145,11 @@ def calcular_angulos_irradiancia(data_hora_str, irradiancia_global, beta, gamma_
     # Convertendo a string da data e hora para objeto datetime
     data_hora = datetime.strptime(data_hora_str, "%d/%m/%y %H:%M")
 
-    # Calculando o dia do ano
-    dia = data_hora.timetuple().tm_yday
-
-    # Determinando a equação do tempo (em horas)
-    B = (360 / 365) * (dia - 81)
-    EoT = 9.87 * np.sin(deg_to_rad(2 * B)) - 7.53 * np.cos(deg_to_rad(B)) - 1.5 * np.sin(deg_to_rad(B))
-    EoT /= 60  # Convertendo para horas
-
-    # Hora local
-    hora_local = data_hora.hour + data_hora.minute / 60
-
-    # Calculando a hora solar
-    hora_solar = hora_local - ((long_local - long_meridiano) / 15) + EoT + horario_verao
-
-    # Calculando a declinação solar
-    declinacao_solar = 23.45 * np.sin(deg_to_rad(360 * (284 + dia) / 365))
-
-    # Calculando o ângulo horário
-    omega = 15 * (hora_solar - 12)
-
-    # Calculando o ângulo zenital do sol
-    theta_z = rad_to_deg(np.arccos(np.sin(deg_to_rad(lat)) * np.sin(deg_to_rad(declinacao_solar)) +
-                                   np.cos(deg_to_rad(lat)) * np.cos(deg_to_rad(declinacao_solar)) * np.cos(
-        deg_to_rad(omega))))
-
-    # Calculando o azimute solar
-    gamma_solar = rad_to_deg(np.arctan2(np.sin(deg_to_rad(omega)),
-                                        (np.cos(deg_to_rad(omega)) * np.sin(deg_to_rad(lat)) -
-                                         np.tan(deg_to_rad(declinacao_solar)) * np.cos(deg_to_rad(lat)))))
-
-    # Cálculo do ângulo de incidência
-    theta_i = rad_to_deg(
-        np.arccos(np.sin(deg_to_rad(theta_z)) * np.cos(deg_to_rad(gamma_p - gamma_solar)) * np.sin(deg_to_rad(beta)) +
-                  np.cos(deg_to_rad(theta_z)) * np.cos(deg_to_rad(beta))))
-
-    # Cálculo da irradiância incidente usando a irradiância global e o ângulo de incidência
-    G_inc = irradiancia_global * np.cos(deg_to_rad(theta_i))
+    geometria = calcular_geometria_solar(data_hora, irradiancia_global, beta, gamma_p, lat, long_local,
+                                         long_meridiano, horario_verao)
 
     return {
-        "Hora Solar": hora_solar,
-        "Ângulo de Incidência": theta_i,
-        "Irradiância Incidente": G_inc
+        "Hora Solar": geometria["Hora Solar"][()],
+        "Ângulo de Incidência": geometria["Ângulo de Incidência"][()],
+        "Irradiância Incidente": geometria["Irradiância Incidente"][()]
     }
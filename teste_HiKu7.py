@@ -1,21 +1,24 @@
 import PySimpleGUI as sg
 import numpy as np
 
+import hiku7
 import report_helper as report_helper
-from single_diode_model import SingleDiodeModel
 from table_data import obter_dados_data_hora, calcular_angulos_irradiancia
 
 
-def HIKU7(canvas, data_selecionada, hora_selecionada, beta, gamma_p, lat, long_local, long_meridiano):
+# Função que apenas calcula (sem interface gráfica), podendo rodar fora da thread principal.
+# Retorna a mesma tupla de HIKU7, a curva calculada (SingleDiodeModelResult) e o ponto de máxima potência;
+# levanta ValueError se os dados de entrada forem inválidos ou não existirem na planilha.
+def calcular_HIKU7(data_selecionada, hora_selecionada, beta, gamma_p, lat, long_local, long_meridiano):
     # Dados do módulo solar HiKu7 Mono PERC 605 W
-    short_circuit_current = 18.52  # [A]
-    open_circuit_voltage = 41.5  # [V]
-    temperature_current_coefficient = 0.05 / 100 * short_circuit_current  # ([%/ºC] / [100%]) * [A/ºC]
-    series_resistance = 0.167  # Estimado (panel series resistance) 0.221
-    shunt_resistance = 9.619  # Estimado (panel parallel (shunt) resistance) 415.405
-    diode_quality_factor = 0.85  # Estimado 1.3
+    short_circuit_current = hiku7.short_circuit_current  # [A]
+    open_circuit_voltage = hiku7.open_circuit_voltage  # [V]
+    temperature_current_coefficient = hiku7.temperature_current_coefficient  # [A/ºC]
+    series_resistance = hiku7.series_resistance
+    shunt_resistance = hiku7.shunt_resistance
+    diode_quality_factor = hiku7.diode_quality_factor
 
-    number_of_series_connected_cells = 60  # Número de células em série
+    number_of_series_connected_cells = hiku7.number_of_series_connected_cells  # Número de células em série
 
     number_of_voltage_decimal_digits = 1
 
@@ -23,12 +26,7 @@ def HIKU7(canvas, data_selecionada, hora_selecionada, beta, gamma_p, lat, long_l
     # data_selecionada = "11/01/2019"  # Substituir por qualquer data de interesse
     # hora_selecionada = "12:00"  # Substituir por qualquer hora de interesse
 
-    try:
-        dados_hora = obter_dados_data_hora(data_selecionada, hora_selecionada)
-
-    except:
-        sg.popup('Dados inseridos incorretos.', title='Erro')
-        print('Dados inseridos incorretos!')
+    dados_hora = obter_dados_data_hora(data_selecionada, hora_selecionada)
 
     if dados_hora is not None:
         # Obtendo valores da planilha
@@ -55,31 +53,22 @@ def HIKU7(canvas, data_selecionada, hora_selecionada, beta, gamma_p, lat, long_l
         # print("Ângulos e Irradiância:", angulos_irradiancia)
 
         # Criar o modelo de diodo simples com os dados do HiKu7
-        single_diode_model = SingleDiodeModel(
-            short_circuit_current,
-            open_circuit_voltage,
-            number_of_series_connected_cells,
-            number_of_voltage_decimal_digits=number_of_voltage_decimal_digits,
-            temperature_current_coefficient=temperature_current_coefficient,
-            series_resistance=series_resistance,
-            shunt_resistance=shunt_resistance,
-            diode_quality_factor=diode_quality_factor
-        )
+        single_diode_model = hiku7.criar_modelo_hiku7(number_of_voltage_decimal_digits)
 
-        # Calculando os parâmetros baseados na irradiância e temperatura da tabela
-        single_diode_model.calculate(operating_temperature, angulos_irradiancia['Irradiância Incidente'])
+        # Calculando a curva baseada na irradiância e temperatura da tabela
+        curva = single_diode_model.calculate(operating_temperature, angulos_irradiancia['Irradiância Incidente'])
 
         # Gerando relatórios e gráficos para o modelo
-        # report_helper.write_result_to_csv_file(single_diode_model, 'single_diode_model_hiku7_605W')
-        report_helper.plot_result(single_diode_model, canvas)
-
-        # Chama a função para gerar as curvas de tensão, corrente e potência
-        # plt.show()
+        # report_helper.write_result_to_csv_file(curva, 'single_diode_model_hiku7_605W')
+        # Ponto de máxima potência resolvido diretamente (precisão da tolerância, não do passo de tensão)
+        maximum_power_point = single_diode_model.calculate_maximum_power_point(
+            operating_temperature, angulos_irradiancia['Irradiância Incidente'])
 
         # printar quantidade de paineis que devem ser utilizados
-        potencia_gerada_modulo = max(single_diode_model.powers)  # Potência máxima gerada pelo módulo fotovoltaico
+        potencia_gerada_modulo = maximum_power_point[2]  # Potência máxima gerada pelo módulo fotovoltaico
         potencia_desejada = dados_hora['Potencia_FV_Avg']  # Potência desejada obtida da tabela
 
+        quantidade_paineis = 0
         if potencia_gerada_modulo > 0:
             quantidade_paineis = potencia_desejada / potencia_gerada_modulo
             quantidade_paineis = np.ceil(quantidade_paineis)  # Arredonda para o próximo número inteiro
@@ -92,7 +81,25 @@ def HIKU7(canvas, data_selecionada, hora_selecionada, beta, gamma_p, lat, long_l
 
     else:
         print("Dados não encontrados para a data e hora selecionadas.")
+        raise ValueError(f"Dados não encontrados para {data_selecionada} {hora_selecionada}.")
+
+    resultados = (temperatura_cel, actual_irradiance, angulos_irradiancia, potencia_desejada, potencia_gerada_modulo,
+                  int(quantidade_paineis), short_circuit_current, open_circuit_voltage,
+                  temperature_current_coefficient, series_resistance, shunt_resistance, diode_quality_factor,
+                  number_of_series_connected_cells)
+    return resultados, curva, maximum_power_point
+
+
+def HIKU7(canvas, data_selecionada, hora_selecionada, beta, gamma_p, lat, long_local, long_meridiano):
+    try:
+        resultados, curva, maximum_power_point = calcular_HIKU7(
+            data_selecionada, hora_selecionada, beta, gamma_p, lat, long_local, long_meridiano)
+    except ValueError:
+        sg.popup('Dados inseridos incorretos.', title='Erro')
+        print('Dados inseridos incorretos!')
+        raise
+
+    # Gerando o gráfico das curvas de tensão, corrente e potência
+    report_helper.plot_result(curva, canvas, maximum_power_point)
 
-    return (temperatura_cel, actual_irradiance, angulos_irradiancia, potencia_desejada, potencia_gerada_modulo,
-            int(quantidade_paineis), short_circuit_current, open_circuit_voltage, temperature_current_coefficient,
-            series_resistance, shunt_resistance, diode_quality_factor, number_of_series_connected_cells)
+    return resultados
@@ -0,0 +1,205 @@
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from simulacao import simular_producao
+
+# Colunas de potência medida comparadas com a potência DC simulada
+colunas_medidas = ['Potencia_S1_Avg', 'Potencia_S2_Avg', 'Potencia_FV_Avg']
+
+# Quantis da distribuição horária dos erros
+quantis_padrao = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+# Função para simular a potência DC de um módulo em cada instante e alinhá-la às potências medidas.
+# As duas séries vêm do mesmo intervalo ordenado da planilha, então o alinhamento é posicional.
+def simular_e_alinhar(beta, gamma_p, lat, long_local, long_meridiano, modelo=None, inicio=None, fim=None):
+    from table_data import obter_dados_intervalo
+
+    producao = simular_producao(beta, gamma_p, lat, long_local, long_meridiano, modelo, inicio, fim)
+    medidas = obter_dados_intervalo(inicio, fim, ['Radiação'] + colunas_medidas)
+
+    alinhado = pd.DataFrame({'Potencia_Modulo': producao['Potencia_DC'].to_numpy()}, index=producao.index)
+    for coluna in ['Radiação'] + colunas_medidas:
+        alinhado[coluna] = np.asarray(medidas[coluna], dtype=float)
+    return alinhado
+
+
+# Função para estimar quantos módulos explicam a potência medida (ajuste de escala por mínimos quadrados)
+def estimar_modulos(potencia_modulo, potencia_medida):
+    validos = np.isfinite(potencia_modulo) & np.isfinite(potencia_medida)
+    denominador = np.sum(potencia_modulo[validos] ** 2)
+    if denominador <= 0:
+        return 1
+    return max(int(np.round(np.sum(potencia_modulo[validos] * potencia_medida[validos]) / denominador)), 1)
+
+
+# Função para calcular as métricas de erro (simulada - medida) de uma coluna
+def calcular_metricas(simulada, medida):
+    erros = simulada - medida
+    media_medida = np.mean(medida) if len(medida) else np.nan
+    rmse = np.sqrt(np.mean(erros ** 2)) if len(erros) else np.nan
+    mbe = np.mean(erros) if len(erros) else np.nan
+    return {
+        'amostras': int(len(erros)),
+        'rmse': float(rmse),
+        'mbe': float(mbe),
+        'mae': float(np.mean(np.abs(erros))) if len(erros) else np.nan,
+        # Normalizadas pela potência medida média
+        'nrmse': float(rmse / media_medida) if media_medida else np.nan,
+        'nmbe': float(mbe / media_medida) if media_medida else np.nan,
+        'potencia_media_simulada': float(np.mean(simulada)) if len(simulada) else np.nan,
+        'potencia_media_medida': float(media_medida),
+    }
+
+
+# Função para calcular a distribuição dos erros por hora do dia (0 a 23) sem laço sobre as horas:
+# contagem, MBE e RMSE com bincount e quantis a partir dos erros ordenados por (hora, erro).
+def distribuicao_por_hora(erros, horas, quantis=quantis_padrao):
+    erros = np.asarray(erros, dtype=float)
+    horas = np.asarray(horas, dtype=int)
+
+    contagem = np.bincount(horas, minlength=24)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mbe = np.bincount(horas, erros, minlength=24) / contagem
+        rmse = np.sqrt(np.bincount(horas, erros ** 2, minlength=24) / contagem)
+
+    ordem = np.lexsort((erros, horas))
+    erros_ordenados = erros[ordem]
+    inicio = np.concatenate([[0], np.cumsum(contagem)[:-1]])
+
+    distribuicao = {'amostras': contagem, 'mbe': mbe, 'rmse': rmse}
+    com_amostras = contagem > 0
+    for quantil in quantis:
+        # Interpolação linear entre as posições vizinhas, como numpy.quantile
+        posicao = quantil * np.maximum(contagem - 1, 0)
+        abaixo = np.floor(posicao).astype(int)
+        acima = np.minimum(abaixo + 1, np.maximum(contagem - 1, 0))
+        peso = posicao - abaixo
+        valores = np.full(24, np.nan)
+        if np.any(com_amostras):
+            inferior = erros_ordenados[(inicio + abaixo)[com_amostras]]
+            superior = erros_ordenados[(inicio + acima)[com_amostras]]
+            valores[com_amostras] = inferior + peso[com_amostras] * (superior - inferior)
+        distribuicao[f'q{int(round(quantil * 100)):02d}'] = valores
+
+    return pd.DataFrame(distribuicao, index=pd.RangeIndex(24, name='Hora'))
+
+
+# Função para validar o modelo contra todas as colunas medidas. modulos é um dicionário {coluna: número de módulos}.
+# Para colunas ausentes o número de módulos é estimado pelos dados, o que absorve um viés sistemático do modelo
+# (as métricas passam a ser relativas): por isso a estimativa usa apenas a fração inicial fracao_ajuste do período,
+# as métricas dessas colunas são calculadas só no restante e as colunas são listadas em 'modulos_estimados'.
+# Instantes com irradiância global abaixo de irradiancia_minima (noite) são ignorados para não diluir as métricas.
+def validar_modelo(beta, gamma_p, lat, long_local, long_meridiano, modelo=None, inicio=None, fim=None, modulos=None,
+                   irradiancia_minima=50., quantis=quantis_padrao, fracao_ajuste=0.25):
+    alinhado = simular_e_alinhar(beta, gamma_p, lat, long_local, long_meridiano, modelo, inicio, fim)
+    modulos = dict(modulos or {})
+
+    potencia_modulo = alinhado['Potencia_Modulo'].to_numpy()
+    horas = alinhado.index.hour.to_numpy()
+    diurno = np.nan_to_num(alinhado['Radiação'].to_numpy()) >= irradiancia_minima
+
+    periodo_ajuste = None
+    if len(alinhado):
+        limite_ajuste = alinhado.index.min() + fracao_ajuste * (alinhado.index.max() - alinhado.index.min())
+        periodo_ajuste = (str(alinhado.index.min()), str(limite_ajuste))
+        em_ajuste = (alinhado.index <= limite_ajuste)
+    else:
+        em_ajuste = np.zeros(0, dtype=bool)
+
+    metricas = {}
+    por_hora = {}
+    modulos_estimados = []
+    for coluna in colunas_medidas:
+        medida = alinhado[coluna].to_numpy()
+        validos = diurno & np.isfinite(medida) & np.isfinite(potencia_modulo)
+        if coluna not in modulos:
+            ajuste = validos & em_ajuste
+            modulos[coluna] = estimar_modulos(potencia_modulo[ajuste], medida[ajuste])
+            modulos_estimados.append(coluna)
+            validos = validos & ~em_ajuste
+
+        simulada = modulos[coluna] * potencia_modulo[validos]
+        metricas[coluna] = calcular_metricas(simulada, medida[validos])
+        por_hora[coluna] = distribuicao_por_hora(simulada - medida[validos], horas[validos], quantis)
+
+    return {
+        'metricas': pd.DataFrame(metricas).T,
+        'por_hora': por_hora,
+        'modulos': modulos,
+        'modulos_estimados': modulos_estimados,
+        'periodo_ajuste': periodo_ajuste if modulos_estimados else None,
+        'periodo': (str(alinhado.index.min()), str(alinhado.index.max())) if len(alinhado) else (None, None),
+    }
+
+
+# Função para converter '--modulos S1=10,S2=10,FV=20' no dicionário {coluna: número de módulos}
+def ler_modulos(texto):
+    modulos = {}
+    for item in filter(None, (parte.strip() for parte in texto.split(','))):
+        nome, _, quantidade = item.partition('=')
+        coluna = f'Potencia_{nome.strip()}_Avg'
+        if coluna not in colunas_medidas or not quantidade.strip().isdigit():
+            raise argparse.ArgumentTypeError(f"{item!r} inválido (use por exemplo S1=10,S2=10,FV=20)")
+        modulos[coluna] = int(quantidade)
+    return modulos
+
+
+# Função para escrever um resumo compacto da validação em JSON (métricas globais e distribuição horária)
+def escrever_resumo(resultado, arquivo):
+    def limpar(valor):
+        # JSON não aceita NaN: horas sem amostras ficam como null
+        return None if isinstance(valor, float) and not np.isfinite(valor) else valor
+
+    resumo = {
+        'periodo': resultado['periodo'],
+        'modulos': resultado['modulos'],
+        'modulos_estimados': resultado['modulos_estimados'],
+        'periodo_ajuste': resultado['periodo_ajuste'],
+        'metricas': {coluna: {chave: limpar(valor) for chave, valor in linha.items()}
+                     for coluna, linha in resultado['metricas'].to_dict('index').items()},
+        'por_hora': {coluna: {chave: [limpar(float(valor)) for valor in valores]
+                              for chave, valores in tabela.to_dict('list').items()}
+                     for coluna, tabela in resultado['por_hora'].items()},
+    }
+    with open(arquivo, 'w', encoding='utf-8') as saida:
+        json.dump(resumo, saida, ensure_ascii=False, indent=1)
+    return resumo
+
+
+# Execução pela linha de comando, sem interface gráfica, por exemplo:
+#   python validacao.py --lat -23 --long -46 --meridiano -45 --modulos S1=10,S2=10,FV=20 --saida validacao.json
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Validação do modelo contra as potências medidas')
+    parser.add_argument('--beta', type=float, default=30., help='Inclinação do painel [°]')
+    parser.add_argument('--gamma', type=float, default=0., help='Orientação do painel [°]')
+    parser.add_argument('--lat', type=float, required=True, help='Latitude [°]')
+    parser.add_argument('--long', type=float, required=True, help='Longitude local [°]')
+    parser.add_argument('--meridiano', type=float, required=True, help='Longitude do meridiano central [°]')
+    parser.add_argument('--modulos', type=ler_modulos, default={},
+                        help='Número de módulos por coluna medida, por exemplo S1=10,S2=10,FV=20 '
+                             '(colunas omitidas têm o número estimado pelos dados)')
+    parser.add_argument('--inicio', default=None, help='Início do período (por exemplo 2019-11-01)')
+    parser.add_argument('--fim', default=None, help='Fim do período (exclusivo)')
+    parser.add_argument('--tabela', action='store_true', help='Usar a tabela de máxima potência do HiKu7')
+    parser.add_argument('--saida', default='validacao.json', help='Arquivo JSON do resumo')
+    argumentos = parser.parse_args()
+
+    modelo = None
+    if argumentos.tabela:
+        from hiku7 import obter_tabela_hiku7
+        modelo = obter_tabela_hiku7()
+
+    resultado = validar_modelo(argumentos.beta, argumentos.gamma, argumentos.lat, argumentos.long,
+                               argumentos.meridiano, modelo, argumentos.inicio, argumentos.fim, argumentos.modulos)
+    escrever_resumo(resultado, argumentos.saida)
+    print(resultado['metricas'][['amostras', 'rmse', 'mbe', 'nrmse', 'nmbe']].to_string())
+    print(f"Módulos: {resultado['modulos']}")
+    if resultado['modulos_estimados']:
+        print(f"Atenção: número de módulos estimado pelos dados para {', '.join(resultado['modulos_estimados'])} "
+              f"(ajuste em {resultado['periodo_ajuste'][0]} a {resultado['periodo_ajuste'][1]}, métricas no "
+              f"restante do período); um viés sistemático do modelo fica parcialmente oculto. Use --modulos.")
+    print(f"Resumo gravado em {argumentos.saida}")